@@ -1,6 +1,59 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
 from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain_core.agents import AgentAction, AgentStep
+from langchain_core.callbacks import AsyncCallbackManagerForChainRun
 from langchain_core.language_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.tools import BaseTool
+from loguru import logger
+
+from omniagent.conf.env import settings
+from omniagent.metrics.instruments import TOOL_CALLS, TOOL_LATENCY
+
+
+def tool_timeout(tool_name: str) -> float:
+    return settings.TOOL_TIMEOUTS.get(tool_name, settings.TOOL_TIMEOUT)
+
+
+class ConcurrentAgentExecutor(AgentExecutor):
+    """
+    AgentExecutor whose tool calls each run under their own timeout.
+
+    The async loop already gathers every tool call from one model turn and
+    returns observations in request order; this makes sure one slow or failing
+    tool turns into an error observation instead of stalling or failing its
+    sibling calls.
+    """
+
+    async def _aperform_agent_action(
+        self,
+        name_to_tool_map: Dict[str, BaseTool],
+        color_mapping: Dict[str, str],
+        agent_action: AgentAction,
+        run_manager: Optional[AsyncCallbackManagerForChainRun] = None,
+    ) -> AgentStep:
+        timeout = tool_timeout(agent_action.tool)
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            return await asyncio.wait_for(
+                super()._aperform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager),
+                timeout=timeout,
+            )
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            logger.warning(f"{agent_action.tool} timed out after {timeout}s")
+            return AgentStep(action=agent_action, observation=f"Error: {agent_action.tool} did not respond within {timeout} seconds.")
+        except Exception as e:
+            outcome = "error"
+            logger.warning(f"{agent_action.tool} failed: {e}")
+            return AgentStep(action=agent_action, observation=f"Error: {agent_action.tool} failed: {e}")
+        finally:
+            TOOL_LATENCY.observe(time.perf_counter() - start, tool=agent_action.tool, outcome=outcome)
+            TOOL_CALLS.inc(tool=agent_action.tool, outcome=outcome)
 
 
 def create_agent(llm: BaseChatModel, tools: list, system_prompt: str):
@@ -12,5 +65,5 @@ def create_agent(llm: BaseChatModel, tools: list, system_prompt: str):
         ]
     )
     agent = create_tool_calling_agent(llm, tools, prompt)
-    executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
+    executor = ConcurrentAgentExecutor(agent=agent, tools=tools, verbose=True)
     return executor
@@ -4,6 +4,8 @@ from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from loguru import logger
 
+from omniagent.metrics.instruments import NODE_LATENCY
+
 
 def build_fallback_agent(llm: BaseChatModel):
     def fallback(state):
@@ -42,10 +44,12 @@ def build_fallback_agent(llm: BaseChatModel):
             ]
         )
         chain = chat_template | llm | StrOutputParser()
+        with NODE_LATENCY.time(node="fallback_agent"):
+            content = chain.invoke({"input": state["messages"][-1].content})
         return {
             "messages": [
                 HumanMessage(
-                    content=chain.invoke({"input": state["messages"][-1].content}),
+                    content=content,
                     name="fallback",
                 )
             ]
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import vertexai
 from chainlit.utils import mount_chainlit
@@ -11,7 +12,12 @@ import traceback
 from starlette.responses import JSONResponse
 
 from omniagent.conf.env import settings
-from omniagent.router import openai_router, widget_router, health_router
+from omniagent.executors.http_client import http_client
+from omniagent.executors.thread_pools import run_blocking, shutdown_thread_pools
+from omniagent.executors.token_registry import token_registry
+from omniagent.metrics.tokenizers import tokenizer_registry
+from omniagent.router import openai_router, widget_router, health_router, batch_router
+from omniagent.batch.worker import batch_workers
 
 load_dotenv()
 app = FastAPI(
@@ -35,6 +41,7 @@ app.add_middleware(
 app.include_router(openai_router)
 app.include_router(widget_router)
 app.include_router(health_router)
+app.include_router(batch_router)
 
 # Check and create static files directory
 static_dir = os.path.join("dist", "static")
@@ -53,6 +60,30 @@ if settings.VERTEX_PROJECT_ID:
     vertexai.init(project=settings.VERTEX_PROJECT_ID)
 
 
+@app.on_event("startup")
+async def start_batch_workers():
+    batch_workers.start()
+
+
+@app.on_event("startup")
+async def start_token_registry():
+    token_registry.start()
+
+
+@app.on_event("startup")
+async def preload_tokenizers():
+    # fetch tiktoken's encodings in the background instead of inside the first request that needs a local count
+    app.state.tokenizers = asyncio.create_task(run_blocking("tokenizer", tokenizer_registry.preload))
+
+
+@app.on_event("shutdown")
+async def shutdown_executors():
+    await batch_workers.stop()
+    await token_registry.stop()
+    await http_client.close()
+    shutdown_thread_pools()
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     error_msg = f"Global error: {str(exc)}\nTraceback:\n{traceback.format_exc()}"
@@ -0,0 +1,162 @@
+import json
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from sqlalchemy import and_, func, select, update
+
+from omniagent.conf.env import settings
+from omniagent.db.models import Batch, BatchItem
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+def _session():
+    # the engine module creates the database and its tables on import, so only load it once batches are used
+    from omniagent.db.database import DBSession
+
+    return DBSession()
+
+
+@dataclass
+class ClaimedItem:
+    id: uuid.UUID
+    batch_id: uuid.UUID
+    model: str
+    request: Dict[str, Any]
+    attempt: int
+
+
+def create_batch(items: List[Dict[str, Any]], metadata: Optional[Dict[str, Any]] = None) -> uuid.UUID:
+    """
+    Queue a batch durably.
+
+    :param items: One dict per line with "custom_id", "model" and the "request" body
+    :return: The new batch id
+    """
+    with _session() as session, session.begin():
+        batch = Batch(id=uuid.uuid4(), status="queued", total=len(items), completed=0, failed=0, metadata_=metadata or {})
+        session.add(batch)
+        session.flush()
+        session.add_all(
+            BatchItem(batchId=batch.id, line=line, customId=item["custom_id"], model=item["model"], request=item["request"], status=PENDING)
+            for line, item in enumerate(items)
+        )
+        return batch.id
+
+
+def get_batch(batch_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+    with _session() as session:
+        batch = session.get(Batch, batch_id)
+        if batch is None:
+            return None
+        running = session.scalar(select(func.count(BatchItem.id)).where(BatchItem.batchId == batch_id, BatchItem.status == RUNNING))
+        return {
+            "id": batch.id,
+            "status": batch.status,
+            "total": batch.total,
+            "completed": batch.completed,
+            "failed": batch.failed,
+            "running": running,
+            "metadata": batch.metadata_,
+            "created_at": batch.createdAt,
+            "started_at": batch.startedAt,
+            "finished_at": batch.finishedAt,
+        }
+
+
+def claim_item(exclude_models: Set[str]) -> Optional[ClaimedItem]:
+    """
+    Claim the next pending item, skipping rows other workers have locked.
+
+    Items whose claim is older than BATCH_ITEM_LEASE are treated as abandoned
+    by a crashed worker and handed out again, ahead of pending items. Ordering by line interleaves
+    concurrent batches instead of draining one before starting the next.
+
+    :param exclude_models: Models already at their batch concurrency limit
+    """
+    lease_cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.BATCH_ITEM_LEASE)
+    with _session() as session, session.begin():
+        # one status per query, so each is an ordered scan of ix_batch_items_claim; abandoned items go first
+        item = None
+        for condition in (and_(BatchItem.status == RUNNING, BatchItem.claimedAt < lease_cutoff), BatchItem.status == PENDING):
+            query = select(BatchItem).where(condition)
+            if exclude_models:
+                query = query.where(BatchItem.model.not_in(exclude_models))
+            item = session.scalars(query.order_by(BatchItem.line).limit(1).with_for_update(skip_locked=True)).first()
+            if item is not None:
+                break
+        if item is None:
+            return None
+
+        item.status = RUNNING
+        item.attempts += 1
+        item.claimedAt = func.now()
+        session.execute(update(Batch).where(Batch.id == item.batchId, Batch.startedAt.is_(None)).values(status="in_progress", startedAt=func.now()))
+        return ClaimedItem(id=item.id, batch_id=item.batchId, model=item.model, request=item.request, attempt=item.attempts)
+
+
+def finish_item(item: ClaimedItem, response: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+    """
+    Record an item's result and update its batch's progress.
+
+    A failed item goes back to the queue until it has been tried
+    BATCH_MAX_ATTEMPTS times. Results from a claim that has since been taken
+    over by another worker are dropped, so an item is never counted twice.
+    """
+    retry = error is not None and item.attempt < settings.BATCH_MAX_ATTEMPTS
+    if retry:
+        values = {"status": PENDING, "error": error, "claimedAt": None}
+    else:
+        values = {"status": FAILED if error is not None else SUCCEEDED, "response": response, "error": error, "finishedAt": func.now()}
+
+    with _session() as session, session.begin():
+        result = session.execute(
+            update(BatchItem).where(BatchItem.id == item.id, BatchItem.status == RUNNING, BatchItem.attempts == item.attempt).values(**values)
+        )
+        if result.rowcount != 1 or retry:
+            return
+
+        counter = Batch.failed if error is not None else Batch.completed
+        session.execute(update(Batch).where(Batch.id == item.batch_id).values({counter: counter + 1}))
+        session.execute(
+            update(Batch)
+            .where(Batch.id == item.batch_id, Batch.completed + Batch.failed >= Batch.total, Batch.finishedAt.is_(None))
+            .values(status="completed", finishedAt=func.now())
+        )
+
+
+def release_items(items: List[ClaimedItem]):
+    """Put claimed but unfinished items back in the queue, e.g. on shutdown."""
+    if not items:
+        return
+    with _session() as session, session.begin():
+        for item in items:
+            session.execute(
+                update(BatchItem)
+                .where(BatchItem.id == item.id, BatchItem.status == RUNNING, BatchItem.attempts == item.attempt)
+                .values(status=PENDING, attempts=BatchItem.attempts - 1, claimedAt=None)
+            )
+
+
+def iter_results(batch_id: uuid.UUID) -> Iterator[str]:
+    """Yield the finished items of a batch as JSONL, in input order."""
+    with _session() as session:
+        query = (
+            select(BatchItem)
+            .where(BatchItem.batchId == batch_id, BatchItem.status.in_([SUCCEEDED, FAILED]))
+            .order_by(BatchItem.line)
+            .execution_options(yield_per=500)
+        )
+        for item in session.scalars(query):
+            line = {
+                "id": str(item.id),
+                "custom_id": item.customId,
+                "response": {"status_code": 200, "body": item.response} if item.status == SUCCEEDED else None,
+                "error": {"message": item.error} if item.status == FAILED else None,
+            }
+            yield json.dumps(line) + "\n"
@@ -0,0 +1,103 @@
+import asyncio
+from collections import Counter
+from typing import Dict, List, Set
+
+from loguru import logger
+
+from omniagent.batch.store import ClaimedItem, claim_item, finish_item, release_items
+from omniagent.conf.env import settings
+from omniagent.executors.thread_pools import run_blocking
+from omniagent.router.admission import BATCH, admission_controller
+from omniagent.router.openai import ChatCompletionRequest, run_chat_completion
+
+
+class BatchWorkerPool:
+    """
+    Background workers that drain queued batch items from Postgres.
+
+    Every worker claims one item at a time, so BATCH_WORKERS bounds the total
+    batch concurrency and BATCH_MODEL_CONCURRENCY bounds it per model. Runs
+    go through the admission controller in the batch lane, so interactive
+    requests always get free slots first.
+    """
+
+    def __init__(self):
+        self._tasks: List[asyncio.Task] = []
+        self._claim_lock = asyncio.Lock()
+        self._in_flight: Counter = Counter()
+        self._claimed: Dict[str, ClaimedItem] = {}
+
+    def start(self):
+        # the first claim imports the database module, which creates databases and tables, so stay idle unless batches are on
+        if self._tasks or not settings.BATCH_ENABLED or settings.BATCH_WORKERS <= 0:
+            return
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(settings.BATCH_WORKERS)]
+        logger.info(f"Started {settings.BATCH_WORKERS} batch workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # hand unfinished items straight back instead of waiting for their lease to expire
+        try:
+            await run_blocking("postgres", release_items, list(self._claimed.values()))
+        except Exception as e:
+            logger.warning(f"Failed to release claimed batch items: {e}")
+        self._claimed.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self._in_flight)
+
+    def _saturated_models(self) -> Set[str]:
+        return {
+            model
+            for model, count in self._in_flight.items()
+            if count >= settings.BATCH_MODEL_CONCURRENCY.get(model, settings.BATCH_MAX_CONCURRENCY_PER_MODEL)
+        }
+
+    async def _work(self):
+        while True:
+            try:
+                # claims are serialized so two workers cannot both take the last free slot of a model
+                async with self._claim_lock:
+                    item = await run_blocking("postgres", claim_item, self._saturated_models())
+                    if item is not None:
+                        self._in_flight[item.model] += 1
+                        self._claimed[str(item.id)] = item
+            except Exception as e:
+                logger.warning(f"Failed to claim batch item: {e}")
+                item = None
+
+            if item is None:
+                await asyncio.sleep(settings.BATCH_POLL_INTERVAL)
+                continue
+
+            try:
+                await self._process(item)
+            except Exception as e:
+                # the item stays claimed and is retried once its lease expires
+                logger.error(f"Failed to record result of batch item {item.id}: {e}")
+            finally:
+                self._in_flight[item.model] -= 1
+                self._claimed.pop(str(item.id), None)
+
+    async def _process(self, item: ClaimedItem):
+        try:
+            request = ChatCompletionRequest(**item.request)
+            ticket = await admission_controller.acquire(item.model, str(item.batch_id), priority=BATCH)
+            try:
+                response = await run_chat_completion(request)
+            finally:
+                ticket.release()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Batch item {item.id} failed on attempt {item.attempt}: {e}")
+            await run_blocking("postgres", finish_item, item, error=str(e))
+            return
+
+        await run_blocking("postgres", finish_item, item, response=response.dict())
+
+
+batch_workers = BatchWorkerPool()
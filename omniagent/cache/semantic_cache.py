@@ -0,0 +1,121 @@
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+from loguru import logger
+
+from omniagent.conf.env import settings
+from omniagent.executors.thread_pools import run_blocking
+from omniagent.index.pgvector_store import build_vector_store
+
+COLLECTION_NAME = "completion_cache"
+
+
+@dataclass
+class CachedCompletion:
+    content: str
+    agents: List[str]
+    tool_calls: List[Dict[str, Any]] = field(default_factory=list)
+    distance: float = 0.0
+
+
+def ttl_for(agents: List[str]) -> int:
+    """
+    How long an answer stays fresh, in seconds.
+
+    An answer assembled by several agents is only as fresh as its most
+    short-lived part. Agents without a configured TTL are never cached.
+    """
+    if not agents:
+        return 0
+    return min(settings.SEMANTIC_CACHE_TTLS.get(agent, 0) for agent in agents)
+
+
+# the store is built inside the worker thread, as its first construction creates the collection's tables
+def _search(query: str, filter: Dict[str, Any]):
+    return build_vector_store(COLLECTION_NAME).similarity_search_with_score(query, k=3, filter=filter)
+
+
+def _delete(ids: List[str]):
+    build_vector_store(COLLECTION_NAME).delete(ids=ids)
+
+
+def _add(query: str, metadata: Dict[str, Any]):
+    build_vector_store(COLLECTION_NAME).add_texts([query], metadatas=[metadata], ids=[metadata["cache_id"]])
+
+
+class SemanticCache:
+    """
+    Completion cache keyed by model and system prompt plus the embedded user query.
+
+    Entries live in their own PGVector collection. A lookup returns the
+    nearest stored query for the same model and system prompt if it is within
+    SEMANTIC_CACHE_MAX_DISTANCE and younger than the TTL of the agents that
+    produced it.
+    """
+
+    def __init__(self):
+        self._pending: Set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return settings.SEMANTIC_CACHE_ENABLED
+
+    async def lookup(self, model: str, query: str, context: str = "") -> Optional[CachedCompletion]:
+        """
+        :param context: Whatever else shapes the answer, such as a hash of the system prompt; only entries stored with the same context match
+        """
+        try:
+            results = await run_blocking("pgvector", _search, query, {"model": model, "context": context})
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed: {e}")
+            return None
+
+        now = time.time()
+        expired = []
+        for doc, distance in results:
+            metadata = doc.metadata
+            if now - metadata["created_at"] > ttl_for(metadata["agents"]):
+                expired.append(metadata["cache_id"])
+                continue
+            if distance > settings.SEMANTIC_CACHE_MAX_DISTANCE:
+                continue
+            logger.info(f"Semantic cache hit for {model} (distance {distance:.4f})")
+            return CachedCompletion(
+                content=metadata["content"], agents=metadata["agents"], tool_calls=metadata.get("tool_calls", []), distance=distance
+            )
+
+        if expired:
+            self._in_background(run_blocking("pgvector", _delete, expired))
+        return None
+
+    def store(self, model: str, query: str, completion: CachedCompletion, context: str = ""):
+        """Save a completion without delaying the response; answers whose agents have no TTL are skipped."""
+        if ttl_for(completion.agents) <= 0 or not completion.content:
+            return
+        cache_id = str(uuid.uuid4())
+        metadata = {
+            "cache_id": cache_id,
+            "model": model,
+            "context": context,
+            "agents": completion.agents,
+            "content": completion.content,
+            "tool_calls": completion.tool_calls,
+            "created_at": time.time(),
+        }
+        self._in_background(run_blocking("pgvector", _add, query, metadata))
+
+    def _in_background(self, coro):
+        task = asyncio.create_task(coro)
+        self._pending.add(task)
+        task.add_done_callback(self._done)
+
+    def _done(self, task: asyncio.Task):
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Semantic cache write failed: {task.exception()}")
+
+
+semantic_cache = SemanticCache()
@@ -0,0 +1,175 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from omniagent.db.models import CacheEntry
+from omniagent.executors.thread_pools import run_blocking
+from omniagent.metrics.instruments import EXECUTOR_CACHE
+
+MISSING = object()
+
+
+def _session():
+    # the engine module creates the database and its tables on import, so only load it once the second tier is used
+    from omniagent.db.database import DBSession
+
+    return DBSession()
+
+
+def read_entry(namespace: str, key: str) -> Optional[Tuple[Any, float]]:
+    """The value stored for key and the seconds it has left, unless it is missing or expired."""
+    with _session() as session:
+        entry = session.scalar(select(CacheEntry).where(CacheEntry.namespace == namespace, CacheEntry.key == key))
+        if entry is None:
+            return None
+        remaining = (entry.expiresAt - datetime.now(timezone.utc)).total_seconds()
+        return (entry.value, remaining) if remaining > 0 else None
+
+
+def write_entry(namespace: str, key: str, value: Any, ttl: float):
+    expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl)
+    statement = insert(CacheEntry).values(namespace=namespace, key=key, value=value, expiresAt=expires_at)
+    statement = statement.on_conflict_do_update(
+        index_elements=[CacheEntry.namespace, CacheEntry.key], set_={"value": statement.excluded.value, "expiresAt": expires_at}
+    )
+    with _session() as session, session.begin():
+        session.execute(statement)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    persistent_hits: int = 0
+    size: int = 0
+
+
+class AsyncTTLCache:
+    """
+    TTL cache for the results of async loaders, such as upstream API calls.
+
+    Unlike decorating a coroutine function with cachetools, this caches the
+    awaited result. Concurrent misses for the same key on an event loop share
+    one load, so a burst of identical tool calls makes one upstream request.
+    Failed loads are not cached.
+
+    With persistent=True, results are also stored in Postgres and read back on
+    a local miss, so the cache survives restarts and is shared between
+    replicas. The second tier is best effort: database errors are logged and
+    the loader is used instead.
+    """
+
+    def __init__(self, namespace: str, ttl: float, maxsize: int, persistent: bool = False):
+        """
+        :param namespace: Name of the cache, used for metrics and to separate its rows in the second tier
+        :param ttl: Seconds a result stays cached
+        :param maxsize: Results kept in memory; the least recently used is evicted first
+        :param persistent: Whether to use the Postgres second tier
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.persistent = persistent
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, Tuple[float, Any]] = OrderedDict()
+        self._inflight: Dict[Tuple[asyncio.AbstractEventLoop, str], asyncio.Task] = {}
+        self._stats = CacheStats()
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        :param key: Cache key
+        :param loader: Called without arguments on a miss; its awaited result is cached
+        :return: The cached or freshly loaded result
+        """
+        value = self._get_local(key)
+        if value is not MISSING:
+            self._count("hit")
+            return value
+
+        loop = asyncio.get_running_loop()
+        inflight_key = (loop, key)
+        task = self._inflight.get(inflight_key)
+        if task is None:
+            self._count("miss")
+            task = loop.create_task(self._load(key, loader))
+            self._inflight[inflight_key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(inflight_key, None))
+        else:
+            self._count("coalesced")
+        # shielded: one caller giving up must not cancel the load the others are waiting for
+        return await asyncio.shield(task)
+
+    def invalidate(self, key: Optional[str] = None):
+        """Drop one key, or everything, from memory; the second tier keeps its rows until they expire."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            self._stats.size = len(self._entries)
+            return asdict(self._stats)
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        if self.persistent:
+            try:
+                stored = await run_blocking("postgres", read_entry, self.namespace, key)
+            except Exception as e:
+                logger.warning(f"Failed to read {self.namespace} cache entry {key} from Postgres: {e}")
+                stored = None
+            if stored is not None:
+                value, remaining = stored
+                self._count("persistent_hit")
+                self._set_local(key, value, remaining)
+                return value
+
+        value = await loader()
+        self._set_local(key, value, self.ttl)
+        if self.persistent:
+            try:
+                await run_blocking("postgres", write_entry, self.namespace, key, value, self.ttl)
+            except Exception as e:
+                logger.warning(f"Failed to write {self.namespace} cache entry {key} to Postgres: {e}")
+        return value
+
+    def _get_local(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def _set_local(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _count(self, result: str):
+        with self._lock:
+            if result == "hit":
+                self._stats.hits += 1
+            elif result == "miss":
+                self._stats.misses += 1
+            elif result == "coalesced":
+                self._stats.coalesced += 1
+            else:
+                self._stats.persistent_hits += 1
+        EXECUTOR_CACHE.inc(cache=self.namespace, result=result)
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Dict, Optional
 
 from dotenv import load_dotenv
 from pydantic import Field
@@ -19,12 +19,120 @@ class Settings(BaseSettings):
     GOOGLE_GEMINI_API_KEY: Optional[str] = Field(default=None, description="Google Gemini API Key. Info: https://ai.google.dev")
     OLLAMA_HOST: Optional[str] = Field(default=None, description="OLLAMA API Base URL. Info: https://github.com/ollama/ollama")
 
+    # LLM client connection pools
+    LLM_POOL_MAX_CONNECTIONS: int = Field(default=100, description="Maximum open connections per LLM provider")
+    LLM_POOL_MAX_KEEPALIVE: int = Field(default=20, description="Maximum idle keep-alive connections per LLM provider")
+    LLM_REQUEST_TIMEOUT: float = Field(default=120.0, description="LLM request timeout in seconds")
+    LLM_PROVIDER_POOLS: Dict[str, Dict[str, float]] = Field(
+        default={},
+        description='Per-provider pool overrides, e.g. {"ollama": {"max_connections": 8, "timeout": 300}}',
+    )
+    OLLAMA_RESCAN_INTERVAL: int = Field(default=300, description="Seconds between background rescans of the Ollama model list")
+
+    # Provider-side prompt caching
+    ANTHROPIC_PROMPT_CACHE: bool = Field(default=True, description="Mark the static system prompt as a cache breakpoint on Anthropic requests")
+    OLLAMA_KEEP_ALIVE: str = Field(
+        default="30m", description="How long Ollama keeps a model loaded after a request, which also keeps its prompt prefix cache warm"
+    )
+
     # API keys for various tools; some features will be disabled if not set
     TAVILY_API_KEY: Optional[str] = Field(default=None, description="Tavily API Key. Info: https://tavily.com/")
     MORALIS_API_KEY: Optional[str] = Field(default=None, description="Moralis API Key. Info: https://moralis.io/")
     ROOTDATA_API_KEY: Optional[str] = Field(default=None, description="RootData API Key. Info: https://www.rootdata.com/")
     COINGECKO_API_KEY: Optional[str] = Field(default=None, description="CoinGecko API Key. Info: https://www.coingecko.com/en/api/pricing")
     RSS3_DATA_API: str = Field(default="https://gi.vividgen.me", description="RSS3 Data API URL")
+    TOKEN_LIST_SNAPSHOT: str = Field(
+        default="data/token_list.json.gz", description="Local snapshot of the li.quest token list, loaded on a cold start"
+    )
+    TOKEN_LIST_TTL: int = Field(default=300, description="Seconds before the token list is refreshed in the background")
+    PROJECT_CACHE_TTL: int = Field(default=86400, description="Seconds RootData search and project detail results stay cached")
+    PROJECT_CACHE_MAXSIZE: int = Field(default=512, description="RootData results kept in memory per cache")
+    EXECUTOR_CACHE_PERSISTENT: bool = Field(
+        default=False, description="Also keep executor results in Postgres, so the cache survives restarts and is shared by replicas"
+    )
+
+    # Feed indexing pipeline
+    INDEX_QUEUE_SIZE: int = Field(default=4, description="Pages buffered between indexing stages before the earlier stage waits")
+    INDEX_EMBED_CONCURRENCY: int = Field(default=2, description="Pages embedded at the same time while indexing")
+    INDEX_WRITE_CONCURRENCY: int = Field(default=2, description="Pages written to pgvector at the same time while indexing")
+    INDEX_WINDOW_DAYS: int = Field(default=180, description="Days of feed history the first crawl of a platform covers")
+    INDEX_WATERMARK_OVERLAP: int = Field(default=3600, description="Seconds before the watermark an incremental crawl starts, to catch late feeds")
+    INDEX_SLICE_DAYS: int = Field(default=7, description="Days per time slice; slices are crawled concurrently and checkpointed one by one")
+    INDEX_CRAWL_CONCURRENCY: int = Field(default=4, description="Time slices crawled at the same time per platform")
+    INDEX_PAGE_SIZE: int = Field(default=50, description="Records requested per feed page to start with")
+    INDEX_MAX_PAGE_SIZE: int = Field(default=100, description="Largest page size the crawler grows to while responses are fast")
+    INDEX_PAGE_TARGET_SECONDS: float = Field(default=5.0, description="Feed responses slower than this shrink the page size")
+    INDEX_FETCH_ATTEMPTS: int = Field(default=5, description="Attempts per feed page before the crawler gives up on its slice")
+    INDEX_SLICE_MAX_RUNS: int = Field(default=3, description="Runs a slice may fail before its crawl is finished without it")
+    EMBEDDING_CACHE_ENABLED: bool = Field(default=True, description="Reuse document embeddings stored in Postgres by model and text hash")
+    EMBEDDING_CONCURRENCY: int = Field(default=4, description="Embedding requests in flight at once; halved on a 429, then grown back")
+    EMBEDDING_MAX_ATTEMPTS: int = Field(default=6, description="Attempts per embedding request when the provider rate limits it")
+    EMBEDDING_BATCH_SIZES: Dict[str, int] = Field(
+        default={"OpenAIEmbeddings": 1000, "VertexAIEmbeddings": 250, "GoogleGenerativeAIEmbeddings": 100},
+        description="Most texts per embedding request, by embeddings class; unlisted providers get 100",
+    )
+    EMBEDDING_BATCH_TOKENS: Dict[str, int] = Field(
+        default={"OpenAIEmbeddings": 250000, "VertexAIEmbeddings": 15000},
+        description="Most (approximate) tokens per embedding request, by embeddings class; unlisted providers are only limited by count",
+    )
+
+    # Shared HTTP client used by the executors
+    HTTP_POOL_MAX_CONNECTIONS: int = Field(default=100, description="Maximum open connections in the executor HTTP pool")
+    HTTP_POOL_MAX_PER_HOST: int = Field(default=20, description="Maximum open connections per upstream host")
+    HTTP_DNS_CACHE_TTL: int = Field(default=300, description="Seconds to cache DNS lookups")
+    HTTP_KEEPALIVE_TIMEOUT: float = Field(default=30.0, description="Seconds an idle keep-alive connection is kept open")
+    HTTP_TIMEOUT: float = Field(default=30.0, description="Total timeout in seconds for a single upstream request")
+    HTTP_MAX_RETRIES: int = Field(default=2, description="Retries for idempotent upstream requests")
+    HTTP_RETRY_BACKOFF: float = Field(default=0.5, description="Base delay in seconds for exponential retry backoff")
+    HTTP_RETRY_MAX_DELAY: float = Field(default=10.0, description="Upper bound in seconds for a single retry delay")
+    UPSTREAM_THREAD_POOL_SIZE: int = Field(default=8, description="Worker threads per upstream for SDKs without async support")
+    UPSTREAM_THREAD_POOLS: Dict[str, int] = Field(default={}, description='Per-upstream worker overrides, e.g. {"moralis": 16}')
+
+    # Semantic response cache for /v1/chat/completions (opt-in)
+    SEMANTIC_CACHE_ENABLED: bool = Field(default=False, description="Serve near-duplicate single-turn questions from the semantic cache")
+    SEMANTIC_CACHE_MAX_DISTANCE: float = Field(default=0.08, description="Maximum cosine distance between a query and a cached query")
+    SEMANTIC_CACHE_TTLS: Dict[str, int] = Field(
+        default={
+            "market_analysis_agent": 60,
+            "block_explorer_agent": 30,
+            "feed_explorer_agent": 300,
+            "research_analyst_agent": 86400,
+            "fallback_agent": 3600,
+        },
+        description="Seconds an answer stays cached, per agent; agents not listed are never cached",
+    )
+
+    # Embedding-based fast router in front of the LLM supervisor (opt-in)
+    FAST_ROUTER_ENABLED: bool = Field(default=False, description="Route confidently classified queries without calling the LLM supervisor")
+    FAST_ROUTER_MIN_SIMILARITY: float = Field(default=0.7, description="Minimum cosine similarity to the best agent's example centroid")
+    FAST_ROUTER_MIN_MARGIN: float = Field(default=0.05, description="Minimum similarity lead over the second-best agent")
+
+    MAX_PARALLEL_AGENTS: int = Field(default=3, description="Maximum agents the supervisor may run in parallel for one turn")
+    TOOL_TIMEOUT: float = Field(default=30.0, description="Seconds a single tool call may run before the agent gets a timeout observation")
+    TOOL_TIMEOUTS: Dict[str, float] = Field(
+        default={"ProjectExecutor": 60.0}, description="Per-tool timeout overrides in seconds, keyed by tool name, as JSON"
+    )
+
+    # Admission control for /v1/chat/completions
+    ADMISSION_MAX_CONCURRENCY: int = Field(default=8, description="Workflows that may run at once per model")
+    ADMISSION_MODEL_CONCURRENCY: Dict[str, int] = Field(default={}, description="Per-model concurrency overrides, as JSON")
+    ADMISSION_MAX_QUEUE: int = Field(default=32, description="Requests that may wait for a slot per model before new ones get a 429")
+    ADMISSION_QUEUE_TIMEOUT: float = Field(default=60.0, description="Seconds a request may wait for a slot before it gets a 429")
+
+    # Offline batch completions
+    BATCH_ENABLED: bool = Field(default=False, description="Accept /v1/batches jobs and run the batch workers, which poll Postgres")
+    BATCH_WORKERS: int = Field(default=4, description="Background workers processing batch items when batches are enabled")
+    BATCH_MAX_CONCURRENCY_PER_MODEL: int = Field(default=2, description="Batch items that may run at once per model")
+    BATCH_MODEL_CONCURRENCY: Dict[str, int] = Field(default={}, description="Per-model batch concurrency overrides, as JSON")
+    BATCH_MAX_ITEMS: int = Field(default=50000, description="Maximum requests in one batch file")
+    BATCH_MAX_ATTEMPTS: int = Field(default=3, description="Times a failing batch item is tried before it is marked failed")
+    BATCH_ITEM_LEASE: int = Field(default=600, description="Seconds after which an item claimed by a crashed worker is handed out again")
+    BATCH_POLL_INTERVAL: float = Field(default=2.0, description="Seconds an idle worker waits before polling for new items")
+
+    # Conversation memory of Chainlit sessions
+    UI_MEMORY_TOKEN_BUDGET: int = Field(default=3000, description="Prompt tokens of conversation history kept per turn, summary included")
+    UI_MEMORY_TOKEN_BUDGETS: Dict[str, int] = Field(default={}, description='Per-model history budget overrides, e.g. {"llama3.2": 1500}, as JSON')
+    UI_MEMORY_SUMMARY_TOKENS: int = Field(default=400, description="Target length of the rolling summary of older turns")
 
     # Chainlit OAuth settings; either all fields are None or all are set
     CHAINLIT_AUTH_SECRET: Optional[str] = Field(default=None, description="Chainlit Auth Secret")
@@ -1,13 +1,23 @@
-from typing import Dict, List
+import threading
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterator, List, Mapping, Optional, Union
 
+import anthropic
+import httpx
 import ollama
 from langchain_anthropic import ChatAnthropic
+from langchain_anthropic.chat_models import _make_message_chunk_from_anthropic_event, _tools_in_params
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
 from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_core.pydantic_v1 import root_validator
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_google_vertexai import ChatVertexAI
 from langchain_ollama import ChatOllama
 from langchain_openai import ChatOpenAI
 from loguru import logger
+from ollama import Options
 from toolz import memoize
 
 from omniagent.conf.env import settings
@@ -34,10 +44,201 @@ MODELS_ICONS = {
 }
 
 
+@dataclass(frozen=True)
+class PoolConfig:
+    max_connections: int
+    max_keepalive_connections: int
+    timeout: float
+
+    @property
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_keepalive_connections)
+
+
+def pool_config(provider: str) -> PoolConfig:
+    """
+    Resolve the connection pool settings for a provider, applying any override from LLM_PROVIDER_POOLS.
+    """
+    overrides = settings.LLM_PROVIDER_POOLS.get(provider, {})
+    return PoolConfig(
+        max_connections=int(overrides.get("max_connections", settings.LLM_POOL_MAX_CONNECTIONS)),
+        max_keepalive_connections=int(overrides.get("max_keepalive_connections", settings.LLM_POOL_MAX_KEEPALIVE)),
+        timeout=float(overrides.get("timeout", settings.LLM_REQUEST_TIMEOUT)),
+    )
+
+
+@memoize
+def get_http_client(provider: str) -> httpx.Client:
+    config = pool_config(provider)
+    return httpx.Client(limits=config.limits, timeout=config.timeout)
+
+
+@memoize
+def get_async_http_client(provider: str) -> httpx.AsyncClient:
+    config = pool_config(provider)
+    return httpx.AsyncClient(limits=config.limits, timeout=config.timeout)
+
+
+@memoize
+def get_ollama_client() -> ollama.Client:
+    config = pool_config("ollama")
+    return ollama.Client(host=settings.OLLAMA_HOST, timeout=config.timeout, limits=config.limits)
+
+
 @memoize
+def get_ollama_async_client() -> ollama.AsyncClient:
+    config = pool_config("ollama")
+    return ollama.AsyncClient(host=settings.OLLAMA_HOST, timeout=config.timeout, limits=config.limits)
+
+
+class PooledChatAnthropic(ChatAnthropic):
+    """ChatAnthropic whose SDK clients share the provider's keep-alive pool."""
+
+    @root_validator()
+    @classmethod
+    def use_pooled_clients(cls, values: Dict) -> Dict:
+        client_params = {
+            "api_key": values["anthropic_api_key"].get_secret_value(),
+            "base_url": values["anthropic_api_url"],
+            "max_retries": values["max_retries"],
+            "default_headers": values.get("default_headers"),
+            "timeout": pool_config("anthropic").timeout,
+        }
+        values["_client"] = anthropic.Client(**client_params, http_client=get_http_client("anthropic"))
+        values["_async_client"] = anthropic.AsyncClient(**client_params, http_client=get_async_http_client("anthropic"))
+        return values
+
+    def _format_params(self, *, messages: List[BaseMessage], stop: Optional[List[str]] = None, **kwargs: Dict) -> Dict:
+        params = super()._format_params(messages=messages, stop=stop, **kwargs)
+        if settings.ANTHROPIC_PROMPT_CACHE:
+            mark_cache_breakpoint(params)
+        return params
+
+    def _format_output(self, data: Any, **kwargs: Any) -> ChatResult:
+        result = super()._format_output(data, **kwargs)
+        result.generations[0].message.response_metadata.update(anthropic_cache_usage(data.usage))
+        return result
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        *,
+        stream_usage: Optional[bool] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        params = self._format_params(messages=messages, stop=stop, **kwargs)
+        coerce_content_to_string = not _tools_in_params(params)
+        for event in self._client.messages.create(**params, stream=True):
+            chunk = self._stream_chunk(event, stream_usage, coerce_content_to_string)
+            if chunk is not None:
+                if run_manager and isinstance(chunk.message.content, str):
+                    run_manager.on_llm_new_token(chunk.message.content, chunk=chunk)
+                yield chunk
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        *,
+        stream_usage: Optional[bool] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        params = self._format_params(messages=messages, stop=stop, **kwargs)
+        coerce_content_to_string = not _tools_in_params(params)
+        async for event in await self._async_client.messages.create(**params, stream=True):
+            chunk = self._stream_chunk(event, stream_usage, coerce_content_to_string)
+            if chunk is not None:
+                if run_manager and isinstance(chunk.message.content, str):
+                    await run_manager.on_llm_new_token(chunk.message.content, chunk=chunk)
+                yield chunk
+
+    def _stream_chunk(self, event: Any, stream_usage: Optional[bool], coerce_content_to_string: bool) -> Optional[ChatGenerationChunk]:
+        """Same as the base class's streaming, except that the prompt cache usage from message_start is kept."""
+        stream_usage = self.stream_usage if stream_usage is None else stream_usage
+        message = _make_message_chunk_from_anthropic_event(event, stream_usage=stream_usage, coerce_content_to_string=coerce_content_to_string)
+        if message is None:
+            return None
+        if event.type == "message_start":
+            message.response_metadata.update(anthropic_cache_usage(event.message.usage))
+        return ChatGenerationChunk(message=message)
+
+
+CACHE_BREAKPOINT = {"type": "ephemeral"}
+
+
+def mark_cache_breakpoint(params: Dict[str, Any]):
+    """
+    Mark the end of the static prompt prefix as an Anthropic cache breakpoint.
+
+    Anthropic caches tools, then system, then messages, so a breakpoint on the
+    system prompt covers the tool definitions too. Without a system prompt the
+    last tool is marked instead. Prefixes shorter than the model's minimum
+    cacheable length are silently not cached.
+    """
+    system = params.get("system")
+    if isinstance(system, str) and system:
+        params["system"] = [{"type": "text", "text": system, "cache_control": CACHE_BREAKPOINT}]
+    elif params.get("tools"):
+        params["tools"] = [*params["tools"][:-1], {**params["tools"][-1], "cache_control": CACHE_BREAKPOINT}]
+
+
+def anthropic_cache_usage(usage: Any) -> Dict[str, int]:
+    """Prompt cache counters from an Anthropic usage object; they are not declared fields on older SDKs, but are kept as extras."""
+    return {key: getattr(usage, key, None) or 0 for key in ("cache_read_input_tokens", "cache_creation_input_tokens")}
+
+
+class PooledChatOllama(ChatOllama):
+    """ChatOllama that reuses one Ollama client instead of opening a new one per call."""
+
+    def _chat_params(self, messages: List[BaseMessage], stop: Optional[List[str]], **kwargs: Any) -> Dict[str, Any]:
+        params = self._default_params
+        for key in self._default_params:
+            if key in kwargs:
+                params[key] = kwargs[key]
+        params["options"]["stop"] = stop if stop is not None else self.stop
+
+        return {
+            "model": params["model"],
+            "messages": self._convert_messages_to_ollama_messages(messages),
+            "options": Options(**params["options"]),
+            "keep_alive": params["keep_alive"],
+            "format": params["format"],
+        }
+
+    async def _acreate_chat_stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[Union[Mapping[str, Any], str]]:
+        chat_params = self._chat_params(messages, stop, **kwargs)
+        client = get_ollama_async_client()
+        if "tools" in kwargs:
+            yield await client.chat(**chat_params, stream=False, tools=kwargs["tools"])  # type:ignore
+        else:
+            async for part in await client.chat(**chat_params, stream=True):  # type:ignore
+                yield part
+
+    def _create_chat_stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> Iterator[Union[Mapping[str, Any], str]]:
+        chat_params = self._chat_params(messages, stop, **kwargs)
+        client = get_ollama_client()
+        if "tools" in kwargs:
+            yield client.chat(**chat_params, stream=False, tools=kwargs["tools"])
+        else:
+            yield from client.chat(**chat_params, stream=True)
+
+
 def get_available_ollama_providers() -> List[str]:
     try:
-        ollama_list = ollama.list()
+        ollama_list = get_ollama_client().list()
         available_models = []
         for model in ollama_list["models"]:
             full_name = model["name"]
@@ -55,38 +256,96 @@ def get_available_ollama_providers() -> List[str]:
         return []
 
 
-def get_provider(model: str, provider_func) -> Dict[str, BaseChatModel]:
-    provider = provider_func(model)
-    return {model: provider} if provider else {}
+class ProviderRegistry:
+    """
+    Long-lived chat model clients, one per available model.
 
+    Clients are built the first time a model shows up and then reused, so every
+    request shares the provider's keep-alive connection pool. The Ollama model
+    list is rescanned on a background thread rather than on the request path.
+    """
 
-def get_available_providers() -> Dict[str, BaseChatModel]:
-    providers = {}
+    def __init__(self, rescan_interval: int):
+        self._rescan_interval = rescan_interval
+        self._lock = threading.Lock()
+        self._providers: Dict[str, BaseChatModel] = {}
+        self._ollama_models: List[str] = []
+        self._started = False
+        self._stop = threading.Event()
+
+    def providers(self) -> Dict[str, BaseChatModel]:
+        if not self._started:
+            self._start()
+        with self._lock:
+            return dict(self._providers)
+
+    def rescan(self):
+        """Pick up Ollama models that were pulled or removed since the last scan."""
+        ollama_models = get_available_ollama_providers() if settings.OLLAMA_HOST else []
+        with self._lock:
+            for model in set(self._ollama_models) - set(ollama_models):
+                self._providers.pop(model, None)
+            for model in ollama_models:
+                if model not in self._providers:
+                    self._providers.update(get_provider(model, get_ollama_provider))
+            if ollama_models != self._ollama_models:
+                logger.info(f"Available ollama models: {ollama_models}")
+            self._ollama_models = ollama_models
+
+    def close(self):
+        self._stop.set()
+
+    def _start(self):
+        with self._lock:
+            if self._started:
+                return
+            provider_configs = [
+                (["gpt-4o-mini", "gpt-4o", "gpt-3.5-turbo"], get_openai_provider),
+                (["claude-3-5-sonnet"], get_anthropic_provider),
+                (["gemini-1.5-pro", "gemini-1.5-flash"], get_gemini_provider),
+            ]
+            for models, provider_func in provider_configs:
+                for model in models:
+                    self._providers.update(get_provider(model, provider_func))
+            self._started = True
+
+        # the first scan happens inline so the initial profile list is complete
+        self.rescan()
+        if settings.OLLAMA_HOST and self._rescan_interval > 0:
+            threading.Thread(target=self._rescan_loop, name="ollama-rescan", daemon=True).start()
+
+    def _rescan_loop(self):
+        while not self._stop.wait(self._rescan_interval):
+            self.rescan()
 
-    provider_configs = [
-        (["gpt-4o-mini", "gpt-4o", "gpt-3.5-turbo"], get_openai_provider),
-        (["claude-3-5-sonnet"], get_anthropic_provider),
-        (["gemini-1.5-pro", "gemini-1.5-flash"], get_gemini_provider),
-    ]
 
-    for models, provider_func in provider_configs:
-        for model in models:
-            providers.update(get_provider(model, provider_func))
+provider_registry = ProviderRegistry(rescan_interval=settings.OLLAMA_RESCAN_INTERVAL)
 
-    if settings.OLLAMA_HOST:
-        ollama_models = get_available_ollama_providers()
-        for model in ollama_models:
-            providers.update(get_provider(model, get_ollama_provider))
 
-    return providers
+def get_provider(model: str, provider_func) -> Dict[str, BaseChatModel]:
+    provider = provider_func(model)
+    return {model: provider} if provider else {}
+
+
+def get_available_providers() -> Dict[str, BaseChatModel]:
+    return provider_registry.providers()
 
 
 def get_openai_provider(model: str) -> BaseChatModel | None:
-    return ChatOpenAI(model=model) if settings.OPENAI_API_KEY else None
+    if not settings.OPENAI_API_KEY:
+        return None
+    return ChatOpenAI(
+        model=model,
+        # the workflows stream, and without this streamed responses carry no usage_metadata to meter
+        stream_usage=True,
+        request_timeout=pool_config("openai").timeout,
+        http_client=get_http_client("openai"),
+        http_async_client=get_async_http_client("openai"),
+    )
 
 
 def get_anthropic_provider(model: str) -> BaseChatModel | None:
-    return ChatAnthropic(model="claude-3-5-sonnet-20240620", ) if settings.ANTHROPIC_API_KEY else None
+    return PooledChatAnthropic(model="claude-3-5-sonnet-20240620", ) if settings.ANTHROPIC_API_KEY else None
 
 
 def get_gemini_provider(model: str) -> BaseChatModel | None:
@@ -98,4 +357,4 @@ def get_gemini_provider(model: str) -> BaseChatModel | None:
 
 
 def get_ollama_provider(model: str) -> BaseChatModel | None:
-    return ChatOllama(model=model) if settings.OLLAMA_HOST else None
+    return PooledChatOllama(model=model, keep_alive=settings.OLLAMA_KEEP_ALIVE) if settings.OLLAMA_HOST else None
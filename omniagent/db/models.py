@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import ARRAY, JSON, Boolean, Column, Integer, Text
+from sqlalchemy import ARRAY, JSON, Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, Text, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import declarative_base
 
@@ -74,3 +74,89 @@ class Feedback(Base):  # type: ignore
     value = Column(Integer, nullable=False)
     comment = Column(Text)
     threadId = Column(UUID(as_uuid=True))
+
+
+class Batch(Base):  # type: ignore
+    __tablename__ = "batches"
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    status = Column(Text, nullable=False, default="queued")
+    total = Column(Integer, nullable=False)
+    completed = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    metadata_ = Column("metadata", JSON)
+    createdAt = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    startedAt = Column(DateTime(timezone=True))
+    finishedAt = Column(DateTime(timezone=True))
+
+
+class BatchItem(Base):  # type: ignore
+    __tablename__ = "batch_items"
+    __table_args__ = (
+        # claim_item's ordered scan over pending (and running) items
+        Index("ix_batch_items_claim", "status", "line"),
+        # per-batch progress and results, in line order
+        Index("ix_batch_items_batch", "batchId", "status", "line"),
+    )
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    batchId = Column(UUID(as_uuid=True), ForeignKey("batches.id", ondelete="CASCADE"), nullable=False)
+    line = Column(Integer, nullable=False)
+    customId = Column(Text, nullable=False)
+    model = Column(Text, nullable=False)
+    request = Column(JSON, nullable=False)
+    status = Column(Text, nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    response = Column(JSON)
+    error = Column(Text)
+    claimedAt = Column(DateTime(timezone=True))
+    finishedAt = Column(DateTime(timezone=True))
+
+
+class CacheEntry(Base):  # type: ignore
+    __tablename__ = "cache_entries"
+    namespace = Column(Text, primary_key=True)
+    key = Column(Text, primary_key=True)
+    value = Column(JSON, nullable=False)
+    expiresAt = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class FeedCrawl(Base):  # type: ignore
+    __tablename__ = "feed_crawls"
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    platform = Column(Text, nullable=False, index=True)
+    since = Column(Integer, nullable=False)
+    until = Column(Integer, nullable=False)
+    # "incremental" crawls move the platform's watermark when they finish, "backfill" crawls do not
+    mode = Column(Text, nullable=False, default="incremental")
+    status = Column(Text, nullable=False, default="running")
+    startedAt = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    finishedAt = Column(DateTime(timezone=True))
+
+
+class FeedCrawlSlice(Base):  # type: ignore
+    __tablename__ = "feed_crawl_slices"
+    crawlId = Column(UUID(as_uuid=True), ForeignKey("feed_crawls.id", ondelete="CASCADE"), primary_key=True)
+    sliceStart = Column(Integer, primary_key=True)
+    sliceEnd = Column(Integer, nullable=False)
+    # "completed", "failed" (crawled again by the next run) or "abandoned" (failed INDEX_SLICE_MAX_RUNS runs in a row)
+    status = Column(Text, nullable=False, default="completed")
+    attempts = Column(Integer, nullable=False, default=1)
+    records = Column(Integer, nullable=False, default=0)
+    completedAt = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class FeedWatermark(Base):  # type: ignore
+    __tablename__ = "feed_watermarks"
+    platform = Column(Text, primary_key=True)
+    # feeds up to this timestamp have been indexed
+    lastTimestamp = Column(Integer, nullable=False)
+    crawlId = Column(UUID(as_uuid=True), ForeignKey("feed_crawls.id", ondelete="SET NULL"))
+    updatedAt = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+
+
+class EmbeddingCacheEntry(Base):  # type: ignore
+    __tablename__ = "embedding_cache"
+    model = Column(Text, primary_key=True)
+    # sha256 of the embedded text
+    hash = Column(Text, primary_key=True)
+    vector = Column(ARRAY(Float), nullable=False)
+    createdAt = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
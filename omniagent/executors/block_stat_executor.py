@@ -1,7 +1,7 @@
+import asyncio
 from typing import Optional, Type
 
 import ccxt
-import requests
 from langchain.callbacks.manager import (
     AsyncCallbackManagerForToolRun,
     CallbackManagerForToolRun,
@@ -9,6 +9,9 @@ from langchain.callbacks.manager import (
 from langchain.tools import BaseTool
 from pydantic import BaseModel, Field
 
+from omniagent.executors.http_client import http_client
+from omniagent.executors.thread_pools import run_coroutine_sync
+
 
 class ARGS(BaseModel):
     chain: str = Field(
@@ -35,31 +38,31 @@ class BlockStatExecutor(BaseTool):
         chain: str,
         run_manager: Optional[CallbackManagerForToolRun] = None,
     ) -> str:
-        return fetch_stat(chain)
+        return run_coroutine_sync(fetch_stat(chain))
 
     async def _arun(
         self,
         chain: str,
         run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
     ) -> str:
-        return fetch_stat(chain)
+        return await fetch_stat(chain)
 
 
 _exchanges = [ccxt.binance(), ccxt.okx(), ccxt.gateio(), ccxt.mexc()]
 
 
-def fetch_stat(chain) -> str:
+async def fetch_stat(chain) -> str:
     url = f"https://api.blockchair.com/{chain}/stats"
 
     headers = {"accept": "application/json"}
 
-    response = requests.get(url, headers=headers)
+    response = await http_client.get(url, headers=headers)
 
-    if response.status_code == 200:
+    if response.status == 200:
         return response.json()
     else:
-        return f"Error fetching data: {response.status_code}, {response.text}"
+        return f"Error fetching data: {response.status}, {response.text}"
 
 
 if __name__ == "__main__":
-    print(fetch_stat("ethereum"))
+    print(asyncio.run(fetch_stat("ethereum")))
@@ -1,7 +1,7 @@
+import asyncio
 import json
 from typing import Optional, Type
 
-import requests
 from langchain.callbacks.manager import (
     AsyncCallbackManagerForToolRun,
     CallbackManagerForToolRun,
@@ -10,6 +10,8 @@ from langchain.tools import BaseTool
 from pydantic import BaseModel, Field
 
 from omniagent.conf.env import settings
+from omniagent.executors.http_client import http_client
+from omniagent.executors.thread_pools import run_coroutine_sync
 
 
 class ARGS(BaseModel):
@@ -33,7 +35,7 @@ class CoinMarketExecutor(BaseTool):
     ) -> str:
         if settings.COINGECKO_API_KEY is None:
             return "Please set COINGECKO_API_KEY in the environment"
-        return json.dumps(fetch_coins_with_market(order, size))
+        return json.dumps(run_coroutine_sync(fetch_coins_with_market(order, size)))
 
     async def _arun(
         self,
@@ -43,10 +45,10 @@ class CoinMarketExecutor(BaseTool):
     ) -> str:
         if settings.COINGECKO_API_KEY is None:
             return "Please set COINGECKO_API_KEY in the environment"
-        return json.dumps(fetch_coins_with_market(order, size))
+        return json.dumps(await fetch_coins_with_market(order, size))
 
 
-def fetch_coins_with_market(order: str, size: int = 20) -> list:
+async def fetch_coins_with_market(order: str, size: int = 20) -> list:
     url = f"https://pro-api.coingecko.com/api/v3/coins/markets?vs_currency=usd&order={order}&per_page={size}"
 
     headers = {
@@ -54,7 +56,7 @@ def fetch_coins_with_market(order: str, size: int = 20) -> list:
         "x-cg-pro-api-key": settings.COINGECKO_API_KEY,
     }
 
-    response = requests.get(url, headers=headers)
+    response = await http_client.get(url, headers=headers)
 
     res = json.loads(response.text)
     return list(
@@ -72,4 +74,4 @@ def fetch_coins_with_market(order: str, size: int = 20) -> list:
 
 
 if __name__ == "__main__":
-    print(fetch_coins_with_market("market_cap_desc"))
+    print(asyncio.run(fetch_coins_with_market("market_cap_desc")))
@@ -8,6 +8,7 @@ from rss3_dsl_sdk.client import RSS3Client
 from rss3_dsl_sdk.schemas.base import ActivityFilter, PaginationOptions
 
 from omniagent.executors.feed_prompt import FEED_PROMPT
+from omniagent.executors.thread_pools import run_blocking
 
 # Define the defi activities and common DeFi networks
 SUPPORTED_NETWORKS = ["arbitrum", "avax", "base", "binance-smart-chain", "ethereum", "gnosis", "linea", "optimism", "polygon"]
@@ -81,11 +82,11 @@ class DeFiExecutor(BaseTool):
                 activities = []
                 for act_type in ["swap", "liquidity", "staking"]:
                     fetch_method = getattr(client, f"fetch_exchange_{act_type}_activities")
-                    act_results = fetch_method(account=address, filters=filters, pagination=pagination)
+                    act_results = await run_blocking("rss3", fetch_method, account=address, filters=filters, pagination=pagination)
                     activities.extend(act_results.data)
             else:
                 fetch_method = getattr(client, f"fetch_exchange_{activity_type}_activities")
-                activities_result = fetch_method(account=address, filters=filters, pagination=pagination)
+                activities_result = await run_blocking("rss3", fetch_method, account=address, filters=filters, pagination=pagination)
                 activities = activities_result.data
 
             # Check if any activities were found
@@ -1,6 +1,5 @@
 from typing import Optional, Type
 
-import aiohttp
 from langchain.callbacks.manager import (
     AsyncCallbackManagerForToolRun,
     CallbackManagerForToolRun,
@@ -11,6 +10,7 @@ from pydantic import BaseModel, Field
 
 from omniagent.conf.env import settings
 from omniagent.executors.feed_prompt import FEED_PROMPT
+from omniagent.executors.http_client import http_client
 
 
 class ParamSchema(BaseModel):
@@ -78,10 +78,9 @@ async def fetch_feeds(address: str, type: str):
     if type in ["post", "comment", "share"]:
         url += f"&type={type}"
     headers = {"Accept": "application/json"}
-    async with aiohttp.ClientSession() as session:
-        logger.info(f"fetching {url}")
-        async with session.get(url, headers=headers) as resp:
-            data = await resp.json()
+    logger.info(f"fetching {url}")
+    resp = await http_client.get(url, headers=headers)
+    data = resp.json()
 
     result = FEED_PROMPT.format(activities_data=data)
 
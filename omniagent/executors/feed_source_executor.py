@@ -10,6 +10,7 @@ from rss3_dsl_sdk.client import RSS3Client
 from rss3_dsl_sdk.schemas.base import ActivityFilter, PaginationOptions
 
 from omniagent.executors.feed_prompt import FEED_PROMPT
+from omniagent.executors.thread_pools import run_blocking
 
 # Define supported networks and platforms
 SUPPORTED_NETWORKS = [
@@ -131,7 +132,9 @@ has done or is doing recently."""
             logger.info(f"Fetching activities for address: {address}, network: {network}, platform: {platform}")
 
             # Fetch activities using the RSS3 client
-            activities = RSS3Client().fetch_activities(account=address, tag=None, activity_type=None, pagination=filters, filters=pagination)
+            activities = await run_blocking(
+                "rss3", RSS3Client().fetch_activities, account=address, tag=None, activity_type=None, pagination=filters, filters=pagination
+            )
 
             # Check if any activities were found
             if not activities.data:
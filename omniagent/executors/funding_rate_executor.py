@@ -1,7 +1,7 @@
 import json
 from typing import Optional, Type
 
-import ccxt
+import ccxt.async_support as ccxt
 from langchain.callbacks.manager import (
     AsyncCallbackManagerForToolRun,
     CallbackManagerForToolRun,
@@ -10,6 +10,8 @@ from langchain.tools import BaseTool
 from loguru import logger
 from pydantic import BaseModel, Field
 
+from omniagent.executors.thread_pools import run_coroutine_sync
+
 
 class ARGS(BaseModel):
     exchange: str = Field(description="Name of the exchange (ccxt supported), e.g., 'binance'")
@@ -28,7 +30,7 @@ class FundingRateExecutor(BaseTool):
         run_manager: Optional[CallbackManagerForToolRun] = None,
     ) -> str:
         try:
-            return json.dumps(fetch_funding_rate(exchange, symbol))
+            return json.dumps(run_coroutine_sync(fetch_funding_rate(exchange, symbol)))
         except Exception as e:
             return f"error: {e}"
 
@@ -39,23 +41,24 @@ class FundingRateExecutor(BaseTool):
         run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
     ) -> str:
         try:
-            return json.dumps(fetch_funding_rate(exchange, symbol))
+            return json.dumps(await fetch_funding_rate(exchange, symbol))
         except Exception as e:
             return f"error: {e}"
 
 
-def fetch_funding_rate(exchange_name: str, symbol: str) -> float:
+async def fetch_funding_rate(exchange_name: str, symbol: str) -> float:
+    if not symbol.endswith(":USDT"):
+        symbol = f"{symbol}:USDT"
+    exchange_class = getattr(ccxt, exchange_name)
+    exchange = exchange_class()
     try:
-        if not symbol.endswith(":USDT"):
-            symbol = f"{symbol}:USDT"
-        exchange_class = getattr(ccxt, exchange_name)
-        exchange = exchange_class()
-
-        funding_rate = exchange.fetch_funding_rate(symbol)
+        funding_rate = await exchange.fetch_funding_rate(symbol)
         return funding_rate
     except Exception as e:
         logger.warning(f"Fetch funding rate error from {exchange_name}: {e}")
         raise e
+    finally:
+        await exchange.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import random
+import time
+import weakref
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+from loguru import logger
+
+from omniagent.conf.env import settings
+from omniagent.metrics.instruments import UPSTREAM_LATENCY, status_class
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+@dataclass
+class HttpResponse:
+    status: int
+    text: str
+    url: str
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+
+@dataclass
+class HostStats:
+    requests: int = 0
+    errors: int = 0
+    retries: int = 0
+    total_seconds: float = 0.0
+
+
+class HttpClient:
+    """
+    App-scoped async HTTP client shared by all executors.
+
+    One aiohttp session is kept per event loop. Its connector keeps per-host
+    keep-alive pools, caches DNS lookups and caps connections per host, so
+    executors stop paying a TCP + TLS handshake on every tool call.
+    """
+
+    def __init__(self):
+        self._sessions: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession] = weakref.WeakKeyDictionary()
+        self._host_stats: Dict[str, HostStats] = defaultdict(HostStats)
+
+    def session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=settings.HTTP_POOL_MAX_CONNECTIONS,
+                limit_per_host=settings.HTTP_POOL_MAX_PER_HOST,
+                ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL,
+                keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+            )
+            session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=settings.HTTP_TIMEOUT))
+            self._sessions[loop] = session
+        return session
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        retries: Optional[int] = None,
+        timeout: Optional[float] = None,
+        **kwargs: Any,
+    ) -> HttpResponse:
+        """
+        Send a request through the shared pool, retrying transient failures with backoff.
+
+        :param method: HTTP method
+        :param url: Request URL
+        :param retries: Retry attempts; defaults to HTTP_MAX_RETRIES for idempotent methods and 0 otherwise
+        :param timeout: Total timeout in seconds for a single attempt
+        :param kwargs: Passed through to aiohttp (headers, params, data, json, ...)
+        :return: The buffered response
+        """
+        method = method.upper()
+        if retries is None:
+            retries = settings.HTTP_MAX_RETRIES if method in IDEMPOTENT_METHODS else 0
+        if timeout is not None:
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
+
+        host = urlsplit(url).netloc
+        attempt = 0
+        while True:
+            response, retry_after = await self._attempt(method, url, host, attempt >= retries, **kwargs)
+            if response is not None:
+                return response
+            self._host_stats[host].retries += 1
+            await asyncio.sleep(_backoff(attempt, retry_after))
+            attempt += 1
+
+    async def _attempt(self, method: str, url: str, host: str, final: bool, **kwargs: Any) -> Tuple[Optional[HttpResponse], Optional[str]]:
+        """
+        Send the request once.
+
+        :param final: Whether this is the last attempt, whose response is returned and whose errors are raised whatever they are
+        :return: The response to return, or None and the Retry-After header when the request should be retried
+        """
+        stats = self._host_stats[host]
+        stats.requests += 1
+        start = time.perf_counter()
+        status = None
+        try:
+            async with self.session().request(method, url, **kwargs) as resp:
+                status = resp.status
+                response = HttpResponse(status=resp.status, text=await resp.text(), url=str(resp.url))
+                retry_after = resp.headers.get("Retry-After")
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            stats.errors += 1
+            if final:
+                raise
+            logger.warning(f"{method} {url} failed ({e!r}), retrying")
+            return None, None
+        finally:
+            elapsed = time.perf_counter() - start
+            stats.total_seconds += elapsed
+            UPSTREAM_LATENCY.observe(elapsed, host=host, status=status_class(status))
+
+        if response.status in RETRY_STATUSES and not final:
+            logger.warning(f"{method} {url} returned {response.status}, retrying")
+            return None, retry_after
+        if not response.ok:
+            stats.errors += 1
+        return response, None
+
+    async def get(self, url: str, **kwargs: Any) -> HttpResponse:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> HttpResponse:
+        return await self.request("POST", url, **kwargs)
+
+    async def close(self):
+        loop = asyncio.get_running_loop()
+        session = self._sessions.pop(loop, None)
+        if session is not None:
+            await session.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool utilization and per-host request counters."""
+        pools = []
+        for session in list(self._sessions.values()):
+            connector = session.connector
+            if connector is None or session.closed:
+                continue
+            pools.append(
+                {
+                    "limit": connector.limit,
+                    "limit_per_host": connector.limit_per_host,
+                    "in_use": len(getattr(connector, "_acquired", ())),
+                    "idle": sum(len(conns) for conns in getattr(connector, "_conns", {}).values()),
+                }
+            )
+        return {"pools": pools, "hosts": {host: asdict(stats) for host, stats in self._host_stats.items()}}
+
+
+def _backoff(attempt: int, retry_after: Optional[str]) -> float:
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), settings.HTTP_RETRY_MAX_DELAY)
+    delay = settings.HTTP_RETRY_BACKOFF * (2**attempt)
+    return min(delay, settings.HTTP_RETRY_MAX_DELAY) * random.uniform(0.5, 1.5)
+
+
+http_client = HttpClient()
@@ -9,6 +9,7 @@ from langchain.tools import BaseTool
 from pydantic import BaseModel, Field
 
 from omniagent.conf.env import settings
+from omniagent.executors.thread_pools import run_blocking
 
 
 class ARGS(BaseModel):
@@ -36,7 +37,7 @@ class NFTBalanceExecutor(BaseTool):
         wallet_address: str,
         run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
     ) -> str:
-        return fetch_balance(chain, wallet_address)
+        return await run_blocking("moralis", fetch_balance, chain, wallet_address)
 
 
 def fetch_balance(chain: str, address: str) -> str:
@@ -10,6 +10,7 @@ from moralis import evm_api
 from pydantic import BaseModel, Field
 
 from omniagent.conf.env import settings
+from omniagent.executors.thread_pools import run_blocking
 
 
 class NFTRankingArgs(BaseModel):
@@ -33,7 +34,7 @@ class NFTRankingExecutor(BaseTool):
         limit: int,
         run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
     ) -> str:
-        return self._run(limit, run_manager)
+        return await run_blocking("moralis", self.collection_ranking, limit)
 
     @staticmethod
     def collection_ranking(limit: int) -> str:
@@ -2,7 +2,6 @@ import asyncio
 import json
 from typing import Optional, Type
 
-import requests
 from langchain.callbacks.manager import (
     AsyncCallbackManagerForToolRun,
     CallbackManagerForToolRun,
@@ -11,6 +10,8 @@ from langchain.tools import BaseTool
 from pydantic import BaseModel, Field
 
 from omniagent.conf.env import settings
+from omniagent.executors.http_client import http_client
+from omniagent.executors.thread_pools import run_coroutine_sync
 
 
 class ARGS(BaseModel):
@@ -27,7 +28,7 @@ class PriceExecutor(BaseTool):
         token: str,
         run_manager: Optional[CallbackManagerForToolRun] = None,
     ) -> str:
-        return asyncio.run(fetch_price(token))
+        return run_coroutine_sync(fetch_price(token))
 
     async def _arun(
         self,
@@ -43,7 +44,7 @@ async def fetch_price(token: str) -> str:
     key = settings.COINGECKO_API_KEY
     headers = {"accept": "application/json", "x-cg-pro-api-key": key}
 
-    response = requests.get(url, headers=headers)
+    response = await http_client.get(url, headers=headers)
     token_: dict = json.loads(response.text)["coins"][0]
     token_id_ = token_["id"]
 
@@ -55,7 +56,7 @@ async def fetch_price(token: str) -> str:
 
     headers = {"accept": "application/json", "x-cg-pro-api-key": key}
 
-    response = requests.get(url, headers=headers)
+    response = await http_client.get(url, headers=headers)
 
     return response.text
 
@@ -1,10 +1,7 @@
 import asyncio
 import json
-from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Type
 
-import aiohttp
-from cachetools import TTLCache, cached
 from langchain.callbacks.manager import (
     AsyncCallbackManagerForToolRun,
     CallbackManagerForToolRun,
@@ -12,7 +9,10 @@ from langchain.callbacks.manager import (
 from langchain.tools import BaseTool
 from pydantic import BaseModel, Field
 
+from omniagent.cache.ttl_cache import AsyncTTLCache
 from omniagent.conf.env import settings
+from omniagent.executors.http_client import http_client
+from omniagent.executors.thread_pools import run_coroutine_sync
 
 API_KEY = ""
 HEADERS = {
@@ -21,18 +21,18 @@ HEADERS = {
     "Content-Type": "application/json",
 }
 
-cache = TTLCache(maxsize=100, ttl=24 * 60 * 60)
+search_cache = AsyncTTLCache(
+    "rootdata_search", ttl=settings.PROJECT_CACHE_TTL, maxsize=settings.PROJECT_CACHE_MAXSIZE, persistent=settings.EXECUTOR_CACHE_PERSISTENT
+)
+detail_cache = AsyncTTLCache(
+    "rootdata_project", ttl=settings.PROJECT_CACHE_TTL, maxsize=settings.PROJECT_CACHE_MAXSIZE, persistent=settings.EXECUTOR_CACHE_PERSISTENT
+)
 
 
 class ARGS(BaseModel):
     keyword: str = Field(description="keyword")
 
 
-def _fetch_project_sync(keyword: str) -> str:
-    projects = asyncio.run(fetch_project(keyword))
-    return json.dumps(projects)
-
-
 class ProjectExecutor(BaseTool):
     name = "ProjectExecutor"
 
@@ -46,9 +46,7 @@ class ProjectExecutor(BaseTool):
     ) -> str:
         if settings.ROOTDATA_API_KEY is None:
             return "Please set ROOTDATA_API_KEY in the environment"
-        with ThreadPoolExecutor() as executor:
-            future = executor.submit(_fetch_project_sync, keyword)
-            return future.result()
+        return json.dumps(run_coroutine_sync(fetch_project(keyword)))
 
     async def _arun(
         self,
@@ -61,27 +59,35 @@ class ProjectExecutor(BaseTool):
         return json.dumps(projects)
 
 
-async def fetch_project_detail(session, project_id: int) -> dict:
+async def fetch_project_detail(project_id: int) -> dict:
+    return await detail_cache.get_or_load(str(project_id), lambda: _fetch_project_detail(project_id))
+
+
+async def _fetch_project_detail(project_id: int) -> dict:
     url = "https://api.rootdata.com/open/get_item"
     payload = json.dumps({"project_id": project_id, "include_team": True, "include_investors": True})
 
-    async with session.post(url, headers=HEADERS, data=payload) as response:
-        response_text = await response.text()
-        return json.loads(response_text)["data"]
+    response = await http_client.post(url, headers=HEADERS, data=payload, retries=settings.HTTP_MAX_RETRIES)
+    return response.json()["data"]
 
 
-@cached(cache)
-async def fetch_project(keyword: str) -> list:
+async def search_project_ids(keyword: str) -> list:
+    return await search_cache.get_or_load(keyword.strip().lower(), lambda: _search_project_ids(keyword))
+
+
+async def _search_project_ids(keyword: str) -> list:
     url = "https://api.rootdata.com/open/ser_inv"
     payload = json.dumps({"query": keyword, "variables": {}})
 
-    async with aiohttp.ClientSession() as session, session.post(url, headers=HEADERS, data=payload) as response:
-        response_text = await response.text()
-        data = json.loads(response_text)["data"]
-        project_ids = [item["id"] for item in data if item["type"] == 1][0:2]
+    response = await http_client.post(url, headers=HEADERS, data=payload, retries=settings.HTTP_MAX_RETRIES)
+    data = response.json()["data"]
+    return [item["id"] for item in data if item["type"] == 1][0:2]
 
-        tasks = [fetch_project_detail(session, project_id) for project_id in project_ids]
-        return list(await asyncio.gather(*tasks))
+
+async def fetch_project(keyword: str) -> list:
+    project_ids = await search_project_ids(keyword)
+    tasks = [fetch_project_detail(project_id) for project_id in project_ids]
+    return list(await asyncio.gather(*tasks))
 
 
 if __name__ == "__main__":
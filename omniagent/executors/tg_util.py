@@ -1,9 +1,7 @@
-import json
-
-import aiohttp
 from loguru import logger
 
 from omniagent.conf.env import settings
+from omniagent.executors.http_client import http_client
 
 
 async def fetch_tg_msgs(channel: str, limit: int = 10):
@@ -18,14 +16,12 @@ async def fetch_tg_msgs(channel: str, limit: int = 10):
     url = f"{settings.RSS3_DATA_API}/rss/telegram/channel/{channel}"
     logger.info(f"Fetching content from {url}")
 
-    async with aiohttp.ClientSession() as session:  # noqa
-        async with session.get(url) as resp:
-            if resp.status == 200:
-                content = await resp.text()
-                data = json.loads(content)
-                return data["data"][:limit]
-            else:
-                logger.error(f"Failed to fetch from {url}. Status: {resp.status}")
+    resp = await http_client.get(url)
+    if resp.status == 200:
+        data = resp.json()
+        return data["data"][:limit]
+    else:
+        logger.error(f"Failed to fetch from {url}. Status: {resp.status}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Coroutine, Dict, Optional, TypeVar
+
+from loguru import logger
+
+from omniagent.conf.env import settings
+from omniagent.executors.http_client import http_client
+
+T = TypeVar("T")
+
+# seconds shutdown waits for the background loop to close its HTTP session and stop
+SHUTDOWN_TIMEOUT = 5.0
+
+_lock = threading.Lock()
+_pools: Dict[str, ThreadPoolExecutor] = {}
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+_background_thread: Optional[threading.Thread] = None
+
+
+def get_thread_pool(upstream: str) -> ThreadPoolExecutor:
+    """
+    Return the bounded thread pool reserved for one upstream.
+
+    Each upstream gets its own pool, so a slow Moralis call can only exhaust
+    Moralis workers and never the event loop or another upstream's workers.
+    """
+    with _lock:
+        pool = _pools.get(upstream)
+        if pool is None:
+            max_workers = settings.UPSTREAM_THREAD_POOLS.get(upstream, settings.UPSTREAM_THREAD_POOL_SIZE)
+            pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"upstream-{upstream}")
+            _pools[upstream] = pool
+        return pool
+
+
+async def run_blocking(upstream: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking SDK call on the upstream's thread pool without blocking the event loop.
+
+    :param upstream: Name of the upstream service, e.g. "moralis"
+    :param func: The blocking callable
+    :return: Whatever func returns
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_thread_pool(upstream), partial(func, *args, **kwargs))
+
+
+def run_coroutine_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Run a coroutine to completion from synchronous code, such as a tool's _run.
+
+    Coroutines share one long-lived event loop on a daemon thread instead of
+    each getting a new loop (and with it a new HTTP session) from asyncio.run,
+    so caches and connection pools keyed by loop are reused between calls.
+    Must not be called from the background loop itself.
+    """
+    global _background_loop, _background_thread
+    with _lock:
+        if _background_loop is None or _background_loop.is_closed():
+            _background_loop = asyncio.new_event_loop()
+            _background_thread = threading.Thread(target=_background_loop.run_forever, name="sync-bridge", daemon=True)
+            _background_thread.start()
+        loop = _background_loop
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+def shutdown_thread_pools():
+    global _background_loop, _background_thread
+    with _lock:
+        pools = list(_pools.values())
+        _pools.clear()
+        loop, thread = _background_loop, _background_thread
+        _background_loop = _background_thread = None
+    # outside the lock, as closing the session may still run code that needs a pool
+    if loop is not None and thread is not None:
+        _close_background_loop(loop, thread)
+    for pool in pools:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _close_background_loop(loop: asyncio.AbstractEventLoop, thread: threading.Thread):
+    # the executors' aiohttp session on this loop is not the one the app closes on its own loop
+    try:
+        asyncio.run_coroutine_threadsafe(http_client.close(), loop).result(SHUTDOWN_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Failed to close the HTTP session of the sync bridge loop: {e!r}")
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(SHUTDOWN_TIMEOUT)
+    if thread.is_alive():
+        logger.warning("The sync bridge loop did not stop in time and is left open")
+        return
+    loop.close()
@@ -0,0 +1,326 @@
+import asyncio
+import gzip
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from omniagent.conf.env import settings
+from omniagent.executors.http_client import http_client
+from omniagent.executors.thread_pools import run_blocking
+from omniagent.metrics.instruments import TOKEN_LIST_FETCHED, TOKEN_LIST_REFRESH
+
+TOKEN_LIST_URL = "https://li.quest/v1/tokens"
+
+# approximate matches are only tried for keywords of at least this length, and only against names and coin keys:
+# a ticker one edit or a short prefix away from another is usually a different asset (usdd/usdc, ape/apex)
+MIN_APPROXIMATE = 5
+MAX_PREFIX = 8
+MAX_FUZZY = 12
+
+Key = Tuple[str, str]
+
+
+def _lower(token: Dict, field: str) -> str:
+    return str(token.get(field) or "").lower()
+
+
+def _rank(token: Dict, keyword: str) -> Tuple[bool, ...]:
+    """Priority of a token matching keyword exactly; the same order select_best_token has always used."""
+    return (
+        "logoURI" in token,
+        _lower(token, "symbol") == keyword,
+        _lower(token, "coinKey") == keyword,
+        token.get("priceUSD") is not None,
+        _lower(token, "name") == keyword,
+    )
+
+
+def _quality(token: Dict, key: str) -> Tuple[Any, ...]:
+    """Priority of a token matching a keyword only approximately: well-known tokens first, then the closest key."""
+    return "logoURI" in token, token.get("priceUSD") is not None, -len(key)
+
+
+def _deletes(key: str) -> List[str]:
+    return [key[:i] + key[i + 1 :] for i in range(len(key))]
+
+
+def _keep(index: Dict[Key, Tuple[Any, Any]], key: Key, rank: Tuple[Any, ...], value: Any):
+    current = index.get(key)
+    if current is None or rank > current[0]:
+        index[key] = (rank, value)
+
+
+class TokenIndex:
+    """
+    Lookup tables over one li.quest token list, built once per list.
+
+    Every token is filed under its lowercased symbol, name and coinKey per
+    chain, keeping only the best-ranked token for each key, so a lookup is a
+    dict access whatever the size of the list. For the names and coin keys
+    of listed tokens (with a logo or a price), prefixes catch truncated names
+    ("unisw" for "uniswap"), and single-character deletions catch one-letter
+    typos ("chainlnk" for "chainlink") the way SymSpell does, without
+    scanning the list. Symbols only ever match exactly.
+    """
+
+    def __init__(self, tokens: Dict[str, List[Dict]]):
+        self.size = sum(len(chain_tokens) for chain_tokens in tokens.values())
+        exact: Dict[Key, Tuple[Any, Dict]] = {}
+        prefix: Dict[Key, Tuple[Any, Dict]] = {}
+        fuzzy: Dict[Key, Tuple[Any, str]] = {}
+
+        for chain_id, chain_tokens in tokens.items():
+            for token in chain_tokens:
+                self._index_token(chain_id, token, exact, prefix, fuzzy)
+
+        # the ranks were only needed to pick the winners; fuzzy keeps them to compare candidates at lookup
+        self._exact = {key: token for key, (_, token) in exact.items()}
+        self._prefix = {key: token for key, (_, token) in prefix.items()}
+        self._fuzzy = fuzzy
+
+    @staticmethod
+    def _index_token(chain_id: str, token: Dict, exact: Dict, prefix: Dict, fuzzy: Dict):
+        """File one token under its symbol, name and coinKey on its chain, and under the approximate keys of the latter two."""
+        symbol, name, coin_key = _lower(token, "symbol"), _lower(token, "name"), _lower(token, "coinKey")
+        for key in {symbol, name, coin_key} - {""}:
+            _keep(exact, (chain_id, key), _rank(token, key), token)
+        # approximate matches only resolve to listed tokens, never to an unpriced token without a logo
+        if "logoURI" not in token and token.get("priceUSD") is None:
+            return
+        for key in {name, coin_key} - {symbol, ""}:
+            if len(key) >= MIN_APPROXIMATE:
+                TokenIndex._index_approximate(chain_id, token, key, prefix, fuzzy)
+
+    @staticmethod
+    def _index_approximate(chain_id: str, token: Dict, key: str, prefix: Dict, fuzzy: Dict):
+        for end in range(MIN_APPROXIMATE, min(len(key), MAX_PREFIX + 1)):
+            _keep(prefix, (chain_id, key[:end]), _quality(token, key), token)
+        if len(key) <= MAX_FUZZY:
+            # the key itself too, for keywords with one extra character
+            for variant in [key, *_deletes(key)]:
+                _keep(fuzzy, (chain_id, variant), _quality(token, key), key)
+
+    def lookup(self, keyword: str, chain_id: str) -> Optional[Dict]:
+        """
+        The best token on the chain for keyword: an exact symbol, name or coinKey match, else a name or coinKey prefix or one-typo match.
+
+        :param keyword: Lowercased symbol, name or coin key
+        :param chain_id: The chain ID, as a string
+        """
+        token = self._exact.get((chain_id, keyword))
+        if token is not None:
+            return token
+
+        if len(keyword) < MIN_APPROXIMATE:
+            return None
+
+        if len(keyword) <= MAX_PREFIX:
+            token = self._prefix.get((chain_id, keyword))
+            if token is not None:
+                logger.warning(f"No exact token match for {keyword} on chain {chain_id}, using prefix match {token.get('name')}")
+                return token
+
+        match = self._fuzzy_match(keyword, chain_id)
+        if match is not None:
+            logger.warning(f"No exact token match for {keyword} on chain {chain_id}, using close match {match}")
+            return self._exact[(chain_id, match)]
+        return None
+
+    def _fuzzy_match(self, keyword: str, chain_id: str) -> Optional[str]:
+        # the keyword itself finds keys it is missing a character of, its deletions keys it has an extra or a substituted character of
+        candidates = [self._fuzzy[(chain_id, variant)] for variant in [keyword, *_deletes(keyword)] if (chain_id, variant) in self._fuzzy]
+        return max(candidates)[1] if candidates else None
+
+
+def read_snapshot(path: str) -> Optional[Tuple[float, Dict[str, List[Dict]]]]:
+    """The fetch time and token list saved at path, if there is a readable snapshot."""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        return snapshot["fetched_at"], snapshot["tokens"]
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable token list snapshot {path}: {e}")
+        return None
+
+
+def write_snapshot(path: str, fetched_at: float, tokens: Dict[str, List[Dict]]):
+    """Replace the snapshot atomically, so a crash mid-write never leaves a truncated file behind."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump({"fetched_at": fetched_at, "tokens": tokens}, f)
+    os.replace(tmp_path, path)
+
+
+def build_from_snapshot(path: str) -> Optional[Tuple[float, TokenIndex]]:
+    snapshot = read_snapshot(path)
+    if snapshot is None:
+        return None
+    fetched_at, tokens = snapshot
+    return fetched_at, TokenIndex(tokens)
+
+
+def build_and_save(path: str, fetched_at: float, tokens: Dict[str, List[Dict]]) -> TokenIndex:
+    index = TokenIndex(tokens)
+    try:
+        write_snapshot(path, fetched_at, tokens)
+    except OSError as e:
+        logger.warning(f"Could not save token list snapshot {path}: {e}")
+    return index
+
+
+@dataclass
+class TokenListStats:
+    tokens: int = 0
+    fetched_at: Optional[float] = None
+    age_seconds: Optional[float] = None
+    refreshing: bool = False
+    refreshes: int = 0
+    failures: int = 0
+    last_refresh_seconds: Optional[float] = None
+    last_error: Optional[str] = None
+
+
+class TokenRegistry:
+    """
+    The li.quest token list, indexed for lookups and persisted to a local snapshot.
+
+    Lookups never wait for a refresh once a list is loaded: when the list is
+    older than TOKEN_LIST_TTL the current index keeps serving while a single
+    background task fetches and indexes the new one (stale-while-revalidate).
+    Concurrent callers share that task, so an expiry costs one upstream
+    request, and a failed refresh keeps the previous list. Only the very first
+    lookup waits, for the snapshot (even a stale one, which is then refreshed
+    in the background) or, without a usable one, for the download; start()
+    does that at app startup and then refreshes ahead of expiry.
+    """
+
+    def __init__(self, snapshot_path: str, ttl: int):
+        self.snapshot_path = snapshot_path
+        self.ttl = ttl
+        self._index: Optional[TokenIndex] = None
+        self._fetched_at = 0.0
+        self._next_attempt = 0.0
+        self._refreshing: Optional[asyncio.Task] = None
+        self._refresher: Optional[asyncio.Task] = None
+        self._stats = TokenListStats()
+
+    async def index(self) -> TokenIndex:
+        if self._index is None:
+            # shielded: a caller giving up must not cancel the load other callers are waiting for
+            await asyncio.shield(self._refresh_task())
+            if self._index is None:
+                raise RuntimeError(f"The token list is unavailable: {self._stats.last_error}")
+        elif self._stale():
+            self._refresh_task()
+        return self._index
+
+    def start(self):
+        if self._refresher is None:
+            self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        for task in (self._refresher, self._refreshing):
+            if task is not None:
+                task.cancel()
+        self._refresher = self._refreshing = None
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._stats
+        stats.refreshing = self._refreshing is not None and not self._refreshing.done()
+        if self._index is not None:
+            stats.fetched_at = self._fetched_at
+            stats.age_seconds = round(time.time() - self._fetched_at, 1)
+        return asdict(stats)
+
+    def _stale(self) -> bool:
+        now = time.time()
+        return now - self._fetched_at >= self.ttl and now >= self._next_attempt
+
+    def _refresh_task(self) -> asyncio.Task:
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.create_task(self._refresh())
+        return self._refreshing
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self._refresh_task()
+            except Exception as e:
+                # _refresh handles its own failures; this only keeps the loop alive if something unexpected slips through
+                logger.opt(exception=e).error("Token list refresh failed unexpectedly")
+                self._next_attempt = time.time() + min(self.ttl, 30)
+            # wake up just before expiry, so lookups keep finding a fresh list, or when a failed refresh may be retried
+            await asyncio.sleep(max(max(self._fetched_at + self.ttl - 1, self._next_attempt) - time.time(), 1))
+
+    async def _refresh(self):
+        if self._index is None and await self._load_snapshot():
+            if self._stale():
+                # serve the snapshot now and download in a task of its own, which waiters on this one do not wait for
+                self._refreshing = asyncio.create_task(self._download())
+            return
+        await self._download()
+
+    async def _load_snapshot(self) -> bool:
+        try:
+            loaded = await run_blocking("token_registry", build_from_snapshot, self.snapshot_path)
+        except Exception as e:
+            self._stats.last_error = str(e)
+            logger.warning(f"Ignoring unreadable token list snapshot {self.snapshot_path}: {e}")
+            return False
+        if loaded is None:
+            return False
+        self._fetched_at, self._index = loaded
+        self._stats.tokens = self._index.size
+        TOKEN_LIST_FETCHED.set(self._fetched_at)
+        logger.info(f"Loaded {self._index.size} tokens from snapshot {self.snapshot_path}")
+        return True
+
+    async def _download(self):
+        start = time.perf_counter()
+        try:
+            tokens = await fetch_token_list()
+            fetched_at = time.time()
+            index = await run_blocking("token_registry", build_and_save, self.snapshot_path, fetched_at, tokens)
+        except Exception as e:
+            elapsed = time.perf_counter() - start
+            TOKEN_LIST_REFRESH.observe(elapsed, outcome="error")
+            self._stats.failures += 1
+            self._stats.last_error = str(e)
+            # retry after a short pause rather than on every lookup
+            self._next_attempt = time.time() + min(self.ttl, 30)
+            logger.warning(f"Failed to refresh the token list, keeping the list from {time.ctime(self._fetched_at)}: {e}")
+            return
+
+        elapsed = time.perf_counter() - start
+        TOKEN_LIST_REFRESH.observe(elapsed, outcome="ok")
+        TOKEN_LIST_FETCHED.set(fetched_at)
+        self._index, self._fetched_at = index, fetched_at
+        self._stats.tokens = index.size
+        self._stats.refreshes += 1
+        self._stats.last_refresh_seconds = round(elapsed, 3)
+        self._stats.last_error = None
+        logger.info(f"Refreshed the token list ({index.size} tokens) in {elapsed:.2f}s")
+
+
+async def fetch_token_list() -> Dict[str, List[Dict]]:
+    """
+    Fetch the token list from the API.
+
+    Returns:
+        Dict[str, List[Dict]]: The token list grouped by chain ID.
+    """
+    logger.info(f"Fetching new data from {TOKEN_LIST_URL}")
+    response = await http_client.get(TOKEN_LIST_URL, headers={"Accept": "application/json"})
+    return response.json()["tokens"]
+
+
+token_registry = TokenRegistry(settings.TOKEN_LIST_SNAPSHOT, settings.TOKEN_LIST_TTL)
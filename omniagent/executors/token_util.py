@@ -1,9 +1,6 @@
-from typing import Dict, List, Optional
+from typing import Dict, Optional
 
-import aiohttp
-from aiocache import Cache
-from aiocache.decorators import cached
-from loguru import logger
+from omniagent.executors.token_registry import token_registry
 
 
 def get_token_data_by_key(token: Dict, key: str) -> str:
@@ -40,28 +37,14 @@ def chain_name_to_id(chain_name: str) -> str:
     return chain_map.get(chain_name, "1")
 
 
-@cached(ttl=300, cache=Cache.MEMORY)
-async def fetch_tokens() -> Dict[str, List[Dict]]:
-    """
-    Fetch the token list from the API and cache it for 60 seconds.
-
-    Returns:
-        Dict[str, List[Dict]]: The token list grouped by chain ID.
-    """
-    url = "https://li.quest/v1/tokens"
-    headers = {"Accept": "application/json"}
-    logger.info(f"Fetching new data from {url}")
-
-    async with aiohttp.ClientSession() as session:  # noqa
-        async with session.get(url, headers=headers) as response:
-            token_list = await response.json()
-            return token_list["tokens"]
-
-
 async def select_best_token(keyword: str, chain_id: str) -> Optional[Dict]:
     """
     Select the best token based on the keyword and chain ID.
 
+    Exact symbol, name or coin key matches win; otherwise, for keywords of
+    five or more characters, a name or coin key prefix or single-typo match
+    is returned. Symbols are never matched approximately. See TokenIndex.
+
     Args:
         keyword (str): The keyword to search for.
         chain_id (str): The chain ID to filter tokens.
@@ -79,27 +62,5 @@ async def select_best_token(keyword: str, chain_id: str) -> Optional[Dict]:
     if keyword == "btc":
         keyword = "wbtc"
 
-    tokens = await fetch_tokens()
-    tokens_on_chain = tokens.get(chain_id, [])
-
-    # Filter based on symbol and name
-    results = [token for token in tokens_on_chain if token["symbol"].lower() == keyword or token["name"].lower() == keyword]
-
-    if results:
-        if len(results) == 1:
-            return results[0]
-
-        # Sort based on priority
-        results.sort(
-            key=lambda x: (
-                "logoURI" in x,
-                x["symbol"].lower() == keyword,
-                x.get("coinKey", "").lower() == keyword,
-                x.get("priceUSD") is not None,
-                x["name"].lower() == keyword,
-            ),
-            reverse=True,
-        )
-        return results[0]
-
-    return None
+    index = await token_registry.index()
+    return index.lookup(keyword, chain_id)
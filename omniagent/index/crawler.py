@@ -0,0 +1,293 @@
+import asyncio
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from omniagent.conf.env import settings
+from omniagent.db.models import FeedCrawl, FeedCrawlSlice, FeedWatermark
+from omniagent.executors.thread_pools import run_blocking
+from omniagent.index.feed_scrape import fetch_feed_page
+
+DAY = 24 * 60 * 60
+MIN_PAGE_SIZE = 5
+
+
+def _session():
+    # the engine module creates the database and its tables on import, so only load it once a crawl starts
+    from omniagent.db.database import DBSession
+
+    return DBSession()
+
+
+@dataclass(frozen=True)
+class TimeSlice:
+    start: int
+    end: int
+
+
+@dataclass
+class Page:
+    slice: TimeSlice
+    records: List[Dict[str, Any]]
+    docs: List[Any] = field(default_factory=list)
+    # texts the embed stage computed vectors for, released after the write
+    embedded: List[str] = field(default_factory=list)
+
+
+def plan_slices(since: int, until: int, slice_seconds: int) -> List[TimeSlice]:
+    """Split [since, until) into slices aligned to multiples of slice_seconds, so a resumed crawl plans the same ones."""
+    slices = []
+    start = since
+    while start < until:
+        end = min((start // slice_seconds + 1) * slice_seconds, until)
+        slices.append(TimeSlice(start, end))
+        start = end
+    # newest first, like the feed itself
+    return slices[::-1]
+
+
+def read_watermark(platform: str) -> Optional[int]:
+    """The timestamp up to which the platform's feed has been indexed, or None before its first crawl finished."""
+    with _session() as session:
+        return session.scalar(select(FeedWatermark.lastTimestamp).where(FeedWatermark.platform == platform))
+
+
+def reset_crawls():
+    """Forget every watermark and crawl, including unfinished ones and their slice checkpoints, so the next run starts over."""
+    with _session() as session, session.begin():
+        session.execute(delete(FeedWatermark))
+        session.execute(delete(FeedCrawl))
+
+
+def start_crawl(platform: str, since: int, until: int, mode: str = "incremental") -> Tuple[uuid.UUID, int, int, Set[int]]:
+    """
+    Resume the platform's unfinished crawl if there is one, otherwise start a new one for [since, until).
+
+    An unfinished incremental crawl is resumed whatever window was asked for; a
+    backfill is only resumed by a backfill of the same window.
+
+    :return: The crawl id, its window, and the starts of the slices it already completed or abandoned
+    """
+    query = select(FeedCrawl).where(FeedCrawl.platform == platform, FeedCrawl.status == "running", FeedCrawl.mode == mode)
+    if mode == "backfill":
+        query = query.where(FeedCrawl.since == since, FeedCrawl.until == until)
+    with _session() as session, session.begin():
+        crawl = session.scalar(query.order_by(FeedCrawl.startedAt.desc()))
+        if crawl is None:
+            crawl = FeedCrawl(id=uuid.uuid4(), platform=platform, since=since, until=until, mode=mode, status="running")
+            session.add(crawl)
+            session.flush()
+            return crawl.id, since, until, set()
+        done = select(FeedCrawlSlice.sliceStart).where(FeedCrawlSlice.crawlId == crawl.id, FeedCrawlSlice.status != "failed")
+        return crawl.id, crawl.since, crawl.until, set(session.scalars(done))
+
+
+def complete_slice(crawl_id: uuid.UUID, time_slice: TimeSlice, records: int):
+    statement = insert(FeedCrawlSlice).values(crawlId=crawl_id, sliceStart=time_slice.start, sliceEnd=time_slice.end, records=records)
+    statement = statement.on_conflict_do_update(
+        index_elements=[FeedCrawlSlice.crawlId, FeedCrawlSlice.sliceStart], set_={"status": "completed", "records": records}
+    )
+    with _session() as session, session.begin():
+        session.execute(statement)
+
+
+def fail_slice(crawl_id: uuid.UUID, time_slice: TimeSlice) -> bool:
+    """
+    Record that a run gave up on a slice.
+
+    :return: Whether the slice has now failed INDEX_SLICE_MAX_RUNS runs and is abandoned, so the crawl can finish without it
+    """
+    first_status = "abandoned" if settings.INDEX_SLICE_MAX_RUNS <= 1 else "failed"
+    statement = insert(FeedCrawlSlice).values(crawlId=crawl_id, sliceStart=time_slice.start, sliceEnd=time_slice.end, status=first_status)
+    attempts = FeedCrawlSlice.attempts + 1
+    statement = statement.on_conflict_do_update(
+        index_elements=[FeedCrawlSlice.crawlId, FeedCrawlSlice.sliceStart],
+        set_={"attempts": attempts, "status": case((attempts >= settings.INDEX_SLICE_MAX_RUNS, "abandoned"), else_="failed")},
+    ).returning(FeedCrawlSlice.status)
+    with _session() as session, session.begin():
+        return session.scalar(statement) == "abandoned"
+
+
+def finish_crawl(crawl_id: uuid.UUID):
+    """Mark the crawl finished and, for an incremental crawl, move the platform's watermark up to its end."""
+    with _session() as session, session.begin():
+        crawl = session.get(FeedCrawl, crawl_id)
+        crawl.status = "finished"
+        crawl.finishedAt = datetime.now(timezone.utc)
+        if crawl.mode != "incremental":
+            return
+        statement = insert(FeedWatermark).values(platform=crawl.platform, lastTimestamp=crawl.until, crawlId=crawl.id)
+        # GREATEST keeps an older resumed crawl from moving the watermark back
+        statement = statement.on_conflict_do_update(
+            index_elements=[FeedWatermark.platform],
+            set_={"lastTimestamp": func.greatest(FeedWatermark.lastTimestamp, statement.excluded.lastTimestamp), "crawlId": crawl.id},
+        )
+        session.execute(statement)
+
+
+class PageSizer:
+    """
+    Adapts the page size to how the feed API copes: pages grow while responses
+    are fast and shrink when they are slow or fail, within [MIN_PAGE_SIZE, INDEX_MAX_PAGE_SIZE].
+    """
+
+    def __init__(self, initial: int, maximum: int, target_seconds: float):
+        self.size = initial
+        self.maximum = maximum
+        self.target_seconds = target_seconds
+
+    def succeeded(self, seconds: float):
+        if seconds < self.target_seconds / 2:
+            self.size = min(self.size * 2, self.maximum)
+        elif seconds > self.target_seconds:
+            self.size = max(self.size // 2, MIN_PAGE_SIZE)
+
+    def failed(self):
+        self.size = max(self.size // 2, MIN_PAGE_SIZE)
+
+
+def backoff(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(settings.HTTP_RETRY_BACKOFF * 2**attempt, settings.HTTP_RETRY_MAX_DELAY))
+
+
+class FeedCrawler:
+    """
+    Crawls one platform's feed over a time window as concurrent time slices.
+
+    The window is cut into INDEX_SLICE_DAYS slices, up to
+    INDEX_CRAWL_CONCURRENCY of which are paged through at once, each with its
+    own adaptive page size. Failed pages are retried with jittered exponential
+    backoff. A slice is checkpointed in Postgres once all of its pages have been
+    written (see page_done), so after a crash the next run resumes the same
+    window and only crawls the slices that were not completed. A slice that
+    fails INDEX_SLICE_MAX_RUNS runs is abandoned so the crawl can still finish.
+    Finishing an incremental crawl moves the platform's watermark (see read_watermark).
+    """
+
+    def __init__(self, platform: str, since: int, until: int, mode: str = "incremental"):
+        """
+        :param platform: RSS3 platform name, e.g. "Mirror"
+        :param since: Start of the window to crawl, ignored when an unfinished crawl is resumed
+        :param until: End of the window to crawl, ignored when an unfinished crawl is resumed
+        :param mode: "incremental" moves the platform's watermark up to until once the crawl finishes; "backfill" leaves it alone
+        """
+        self.platform = platform
+        self.since = since
+        self.until = until
+        self.mode = mode
+        self.crawl_id: Optional[uuid.UUID] = None
+        self.failed_slices: List[TimeSlice] = []
+        self._pending: Dict[TimeSlice, int] = {}
+        self._records: Dict[TimeSlice, int] = {}
+        self._fetched: Set[TimeSlice] = set()
+        self._remaining: Set[TimeSlice] = set()
+
+    async def pages(self) -> AsyncIterator[Page]:
+        """Pages from every slice, interleaved in the order they arrive."""
+        self.crawl_id, since, until, completed = await run_blocking("postgres", start_crawl, self.platform, self.since, self.until, self.mode)
+        slices = [s for s in plan_slices(since, until, settings.INDEX_SLICE_DAYS * DAY) if s.start not in completed]
+        if completed:
+            logger.info(f"Resuming crawl of {self.platform}: {len(completed)} slices already done, {len(slices)} left")
+        self._remaining = set(slices)
+        if not slices:
+            await run_blocking("postgres", finish_crawl, self.crawl_id)
+            return
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.INDEX_QUEUE_SIZE)
+        semaphore = asyncio.Semaphore(settings.INDEX_CRAWL_CONCURRENCY)
+        tasks = [asyncio.create_task(self._crawl_slice(time_slice, queue, semaphore)) for time_slice in slices]
+        finished = asyncio.create_task(self._close_when_done(tasks, queue))
+        try:
+            while True:
+                page = await queue.get()
+                if page is None:
+                    break
+                if isinstance(page, Exception):
+                    raise page
+                yield page
+        finally:
+            for task in [*tasks, finished]:
+                task.cancel()
+
+    async def page_done(self, page: Page):
+        """Call once a page has been written; completes the slice's checkpoint when it was the slice's last page."""
+        self._pending[page.slice] -= 1
+        await self._maybe_complete(page.slice)
+
+    async def _close_when_done(self, tasks: List[asyncio.Task], queue: asyncio.Queue):
+        # fetch failures are handled per slice, so anything else (e.g. a checkpoint write failing) fails the crawl
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        errors = [result for result in results if isinstance(result, Exception)]
+        for error in errors:
+            logger.opt(exception=error).error(f"Crawling a {self.platform} slice failed")
+        await queue.put(errors[0] if errors else None)
+
+    async def _crawl_slice(self, time_slice: TimeSlice, queue: asyncio.Queue, semaphore: asyncio.Semaphore):
+        async with semaphore:
+            sizer = PageSizer(settings.INDEX_PAGE_SIZE, settings.INDEX_MAX_PAGE_SIZE, settings.INDEX_PAGE_TARGET_SECONDS)
+            self._pending[time_slice] = 0
+            self._records[time_slice] = 0
+            cursor = None
+            while True:
+                response = await self._fetch(time_slice, sizer, cursor)
+                if response is None:
+                    await self._fail(time_slice)
+                    return
+                records = response.get("data") or []
+                if records:
+                    self._pending[time_slice] += 1
+                    self._records[time_slice] += len(records)
+                    await queue.put(Page(time_slice, records))
+                cursor = (response.get("meta") or {}).get("cursor")
+                if not cursor or not records:
+                    break
+
+        self._fetched.add(time_slice)
+        await self._maybe_complete(time_slice)
+
+    async def _fetch(self, time_slice: TimeSlice, sizer: PageSizer, cursor: Optional[str]) -> Optional[Dict[str, Any]]:
+        for attempt in range(settings.INDEX_FETCH_ATTEMPTS):
+            start = time.perf_counter()
+            try:
+                # the crawler does its own backoff, and shrinks the page before trying again
+                response = await fetch_feed_page(self.platform, time_slice.start, time_slice.end, sizer.size, cursor, max_retries=0)
+            except Exception as e:
+                sizer.failed()
+                delay = backoff(attempt)
+                logger.warning(f"Fetching {self.platform} slice {time_slice} failed (attempt {attempt + 1}), retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+                continue
+            sizer.succeeded(time.perf_counter() - start)
+            return response
+
+        return None
+
+    async def _fail(self, time_slice: TimeSlice):
+        self.failed_slices.append(time_slice)
+        abandoned = await run_blocking("postgres", fail_slice, self.crawl_id, time_slice)
+        if not abandoned:
+            logger.error(f"Giving up on {self.platform} slice {time_slice} for now; the next run will crawl it again")
+            return
+        # a slice that keeps failing must not hold the crawl, and with it the watermark, back forever
+        logger.error(f"Abandoning {self.platform} slice {time_slice} after {settings.INDEX_SLICE_MAX_RUNS} failed runs; backfill it to retry")
+        await self._slice_done(time_slice)
+
+    async def _maybe_complete(self, time_slice: TimeSlice):
+        if time_slice not in self._fetched or self._pending[time_slice] > 0 or time_slice not in self._remaining:
+            return
+        await run_blocking("postgres", complete_slice, self.crawl_id, time_slice, self._records[time_slice])
+        await self._slice_done(time_slice)
+
+    async def _slice_done(self, time_slice: TimeSlice):
+        self._remaining.discard(time_slice)
+        if not self._remaining:
+            await run_blocking("postgres", finish_crawl, self.crawl_id)
+            logger.info(f"Finished crawl of {self.platform}")
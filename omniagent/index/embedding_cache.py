@@ -0,0 +1,121 @@
+import hashlib
+import threading
+from typing import Dict, List, Optional, Sequence
+
+from langchain_core.embeddings import Embeddings
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from omniagent.db.models import EmbeddingCacheEntry
+from omniagent.executors.thread_pools import run_blocking
+from omniagent.metrics.instruments import EMBEDDING_CACHE
+
+
+def _session():
+    # the engine module creates the database and its tables on import, so only load it once the cache is used
+    from omniagent.db.database import DBSession
+
+    return DBSession()
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def embedding_model_name(embeddings: Embeddings) -> str:
+    """Provider and model, e.g. "OpenAIEmbeddings:text-embedding-3-large"; vectors of different models never mix in the cache."""
+    model = getattr(embeddings, "model_name", None) or getattr(embeddings, "model", None)
+    return f"{type(embeddings).__name__}:{model}"
+
+
+def read_vectors(model: str, hashes: Sequence[str]) -> Dict[str, List[float]]:
+    with _session() as session:
+        query = select(EmbeddingCacheEntry.hash, EmbeddingCacheEntry.vector).where(
+            EmbeddingCacheEntry.model == model, EmbeddingCacheEntry.hash.in_(hashes)
+        )
+        rows = session.execute(query)
+        return {row.hash: row.vector for row in rows}
+
+
+def write_vectors(model: str, vectors: Dict[str, List[float]]):
+    statement = insert(EmbeddingCacheEntry).values([{"model": model, "hash": key, "vector": vector} for key, vector in vectors.items()])
+    with _session() as session, session.begin():
+        session.execute(statement.on_conflict_do_nothing())
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings that looks document vectors up in Postgres by (model, sha256 of the text) before calling the provider.
+
+    Re-indexed documents, chunks shared by overlapping splits and articles
+    published on several platforms are embedded once per model. Queries are
+    passed straight through, since they rarely repeat. The cache is best
+    effort: database errors are logged and the provider embeds everything.
+    """
+
+    def __init__(self, embeddings: Embeddings, model: Optional[str] = None):
+        """
+        :param embeddings: The provider's embeddings
+        :param model: Cache namespace; defaults to embedding_model_name(embeddings)
+        """
+        self.embeddings = embeddings
+        self.model = model or embedding_model_name(embeddings)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [text_hash(text) for text in texts]
+        try:
+            cached = read_vectors(self.model, list(set(hashes)))
+        except Exception as e:
+            logger.warning(f"Failed to read cached embeddings of {self.model}: {e}")
+            cached = {}
+        missing = self._missing(texts, hashes, cached)
+        if missing:
+            computed = dict(zip(missing, self.embeddings.embed_documents(list(missing.values()))))
+            try:
+                write_vectors(self.model, computed)
+            except Exception as e:
+                logger.warning(f"Failed to cache embeddings of {self.model}: {e}")
+            cached.update(computed)
+        return [cached[key] for key in hashes]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [text_hash(text) for text in texts]
+        try:
+            cached = await run_blocking("postgres", read_vectors, self.model, list(set(hashes)))
+        except Exception as e:
+            logger.warning(f"Failed to read cached embeddings of {self.model}: {e}")
+            cached = {}
+        missing = self._missing(texts, hashes, cached)
+        if missing:
+            computed = dict(zip(missing, await self.embeddings.aembed_documents(list(missing.values()))))
+            try:
+                await run_blocking("postgres", write_vectors, self.model, computed)
+            except Exception as e:
+                logger.warning(f"Failed to cache embeddings of {self.model}: {e}")
+            cached.update(computed)
+        return [cached[key] for key in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.embeddings.aembed_query(text)
+
+    def stats(self) -> Dict[str, int]:
+        """Texts served from the cache (embedding calls saved) and texts the provider embedded."""
+        with self._lock:
+            return dict(self._stats)
+
+    def _missing(self, texts: List[str], hashes: List[str], cached: Dict[str, List[float]]) -> Dict[str, str]:
+        # duplicates within one call are embedded once as well
+        missing = {key: text for key, text in zip(hashes, texts) if key not in cached}
+        hits = len(texts) - len(missing)
+        with self._lock:
+            self._stats["hits"] += hits
+            self._stats["misses"] += len(missing)
+        EMBEDDING_CACHE.inc(hits, model=self.model, result="hit")
+        EMBEDDING_CACHE.inc(len(missing), model=self.model, result="miss")
+        return missing
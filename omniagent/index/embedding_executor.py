@@ -0,0 +1,238 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from http import HTTPStatus
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+import openai
+from google.api_core.exceptions import ResourceExhausted, TooManyRequests
+from langchain_core.embeddings import Embeddings
+from loguru import logger
+
+from omniagent.conf.env import settings
+from omniagent.executors.thread_pools import run_coroutine_sync
+from omniagent.metrics.instruments import EMBEDDING_BATCH_LATENCY, EMBEDDING_IN_FLIGHT, EMBEDDING_TEXTS
+from omniagent.metrics.tokenizers import approximate_tokens
+
+
+def _causes(error: Optional[BaseException]) -> Iterator[BaseException]:
+    # wrappers such as GoogleGenerativeAIError keep the SDK's error as their cause
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Whether a provider error is a 429, whichever SDK raised it."""
+    for cause in _causes(error):
+        if isinstance(cause, (openai.RateLimitError, ResourceExhausted, TooManyRequests)):
+            return True
+        for attribute in ("status_code", "code"):
+            status = getattr(cause, attribute, None)
+            if isinstance(status, int) and status == HTTPStatus.TOO_MANY_REQUESTS:
+                return True
+    return False
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    for cause in _causes(error):
+        response = getattr(cause, "response", None)
+        headers = getattr(response, "headers", None)
+        value = headers.get("retry-after") if headers is not None else None
+        if value is None:
+            continue
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def pack_batches(texts: List[str], max_texts: int, max_tokens: Optional[int]) -> List[Tuple[int, int]]:
+    """
+    Split texts into consecutive batches within a provider's request limits.
+
+    :return: (start, end) index ranges into texts
+    """
+    batches = []
+    start, tokens = 0, 0
+    for position, text in enumerate(texts):
+        text_tokens = approximate_tokens(text)
+        full = position - start >= max_texts or (max_tokens is not None and tokens + text_tokens > max_tokens)
+        if full and position > start:
+            batches.append((start, position))
+            start, tokens = position, 0
+        tokens += text_tokens
+    if start < len(texts):
+        batches.append((start, len(texts)))
+    return batches
+
+
+class AdaptiveLimiter:
+    """
+    A semaphore whose limit halves on rate limiting and grows back by one after
+    `limit` successes in a row, up to its maximum.
+
+    Waiters may come from different event loops (the indexer's and the sync
+    bridge's), so the state is guarded by a thread lock and waiters are woken
+    on their own loop.
+    """
+
+    def __init__(self, maximum: int):
+        self.maximum = maximum
+        self.limit = maximum
+        self._active = 0
+        self._successes = 0
+        self._lock = threading.Lock()
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+
+    async def acquire(self):
+        with self._lock:
+            if self._active < self.limit and not self._waiters:
+                self._active += 1
+                return
+            loop = asyncio.get_running_loop()
+            waiter = loop.create_future()
+            self._waiters.append((loop, waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                if (loop, waiter) in self._waiters:
+                    self._waiters.remove((loop, waiter))
+                    raise
+            # the slot was handed over just before the cancellation; pass it on
+            self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            self._active -= 1
+            self._wake()
+
+    def succeeded(self):
+        with self._lock:
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.maximum:
+                self.limit += 1
+                self._successes = 0
+                self._wake()
+
+    def rate_limited(self):
+        with self._lock:
+            self.limit = max(1, self.limit // 2)
+            self._successes = 0
+
+    def _wake(self):
+        while self._waiters and self._active < self.limit:
+            loop, waiter = self._waiters.popleft()
+            self._active += 1
+            loop.call_soon_threadsafe(_resolve, waiter)
+
+
+def _resolve(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class BatchedEmbeddings(Embeddings):
+    """
+    Embeddings that sends a provider's texts in request-sized batches, several at a time.
+
+    Texts are packed into batches within the provider's limits on inputs and
+    tokens per request (EMBEDDING_BATCH_SIZES, EMBEDDING_BATCH_TOKENS), and up
+    to EMBEDDING_CONCURRENCY batches are in flight at once. A 429 halves the
+    concurrency, which then grows back one batch at a time, and the batch is
+    retried after Retry-After or a jittered exponential backoff. Throughput is
+    reported by stats() and the omniagent_embedding_texts_total metric.
+    """
+
+    def __init__(self, embeddings: Embeddings, provider: Optional[str] = None):
+        """
+        :param embeddings: The provider's embeddings; its own retries should be off, so 429s reach this class
+        :param provider: Key into the batch limit settings; defaults to the embeddings' class name
+        """
+        self.embeddings = embeddings
+        self.provider = provider or type(embeddings).__name__
+        self.max_texts = settings.EMBEDDING_BATCH_SIZES.get(self.provider, 100)
+        self.max_tokens = settings.EMBEDDING_BATCH_TOKENS.get(self.provider)
+        self.limiter = AdaptiveLimiter(settings.EMBEDDING_CONCURRENCY)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {"texts": 0, "batches": 0, "rate_limited": 0, "busy_seconds": 0.0}
+        self._in_flight = 0
+        self._busy_since = 0.0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return run_coroutine_sync(self.aembed_documents(texts))
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        batches = pack_batches(texts, self.max_texts, self.max_tokens)
+        results = await asyncio.gather(*(self._embed_batch(texts[start:end]) for start, end in batches))
+        return [vector for vectors in results for vector in vectors]
+
+    def embed_query(self, text: str) -> List[float]:
+        return run_coroutine_sync(self.aembed_query(text))
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self._call(lambda: self.embeddings.aembed_query(text), 1)
+
+    def stats(self) -> Dict[str, Any]:
+        """Texts embedded, batches sent, 429s seen, and texts per second while any batch was in flight."""
+        with self._lock:
+            stats = dict(self._stats)
+            if self._in_flight:
+                stats["busy_seconds"] += time.perf_counter() - self._busy_since
+        stats["texts_per_second"] = round(stats["texts"] / stats["busy_seconds"], 2) if stats["busy_seconds"] else 0.0
+        stats["busy_seconds"] = round(stats["busy_seconds"], 2)
+        stats["concurrency"] = self.limiter.limit
+        return stats
+
+    async def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        return await self._call(lambda: self.embeddings.aembed_documents(batch), len(batch))
+
+    async def _call(self, request, size: int):
+        for attempt in range(settings.EMBEDDING_MAX_ATTEMPTS):
+            await self.limiter.acquire()
+            self._started()
+            start = time.perf_counter()
+            try:
+                result = await request()
+            except Exception as e:
+                EMBEDDING_BATCH_LATENCY.observe(time.perf_counter() - start, provider=self.provider, outcome="error")
+                if not is_rate_limited(e) or attempt + 1 >= settings.EMBEDDING_MAX_ATTEMPTS:
+                    raise
+                self.limiter.rate_limited()
+                delay = retry_after(e) or random.uniform(0, min(settings.HTTP_RETRY_BACKOFF * 2**attempt, settings.HTTP_RETRY_MAX_DELAY))
+                with self._lock:
+                    self._stats["rate_limited"] += 1
+                logger.warning(f"{self.provider} rate limited a batch of {size}, concurrency now {self.limiter.limit}, retrying in {delay:.1f}s")
+            else:
+                EMBEDDING_BATCH_LATENCY.observe(time.perf_counter() - start, provider=self.provider, outcome="ok")
+                EMBEDDING_TEXTS.inc(size, provider=self.provider)
+                self.limiter.succeeded()
+                with self._lock:
+                    self._stats["texts"] += size
+                    self._stats["batches"] += 1
+                return result
+            finally:
+                self._finished()
+                self.limiter.release()
+            await asyncio.sleep(delay)
+
+    def _started(self):
+        with self._lock:
+            if self._in_flight == 0:
+                self._busy_since = time.perf_counter()
+            self._in_flight += 1
+        EMBEDDING_IN_FLIGHT.set(self._in_flight, provider=self.provider)
+
+    def _finished(self):
+        with self._lock:
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self._stats["busy_seconds"] += time.perf_counter() - self._busy_since
+        EMBEDDING_IN_FLIGHT.set(self._in_flight, provider=self.provider)
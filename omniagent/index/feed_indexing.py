@@ -1,15 +1,22 @@
+import argparse
+import asyncio
 import datetime
+from typing import List, Optional, Sequence
 
 from dotenv import load_dotenv
 from langchain.indexes import SQLRecordManager
 from langchain_core.documents import Document
 from langchain_core.indexing import index
+from langchain_core.indexing.api import _HashedDocument
 from langchain_text_splitters import CharacterTextSplitter
 from loguru import logger
 
 from omniagent.conf.env import settings
-from omniagent.index.feed_scrape import fetch_iqwiki_feeds, fetch_mirror_feeds
-from omniagent.index.pgvector_store import build_vector_store
+from omniagent.executors.thread_pools import run_blocking
+from omniagent.index.crawler import FeedCrawler, Page, read_watermark, reset_crawls
+from omniagent.index.embedding_cache import CachedEmbeddings
+from omniagent.index.pgvector_store import build_embeddings, build_indexing_store, build_vector_store
+from omniagent.index.pipeline import Pipeline, Stage
 
 load_dotenv()
 
@@ -21,55 +28,129 @@ def _clear():
     index([], record_manager, build_vector_store(), cleanup="incremental", source_id_key="id")
 
 
-def build_index():
-    indexing_iqwiki()
-    indexing_mirror()
+def build_index(since: Optional[int] = None, until: Optional[int] = None):
+    """
+    Index the feeds of every platform.
 
+    Without arguments each platform is indexed incrementally, from its
+    watermark (or INDEX_WINDOW_DAYS ago on the first run) up to now. With
+    since, the range [since, until) is backfilled instead and the watermarks
+    are left alone.
+    """
+    asyncio.run(_build_index(since, until))
 
-def indexing_iqwiki():
-    index_feed(fetch_iqwiki_feeds, "iqwiki")
 
+async def _build_index(since: Optional[int] = None, until: Optional[int] = None):
+    # the platforms share nothing but the database, so crawl them side by side
+    await asyncio.gather(indexing_iqwiki(since, until), indexing_mirror(since, until))
+    embeddings = build_embeddings()
+    if isinstance(embeddings, CachedEmbeddings):
+        stats = embeddings.stats()
+        logger.info(f"Embedding cache saved {stats['hits']} of {stats['hits'] + stats['misses']} embedding calls")
+        embeddings = embeddings.embeddings
+    logger.info(f"Embedding throughput: {embeddings.stats()}")
 
-def indexing_mirror():
-    index_feed(fetch_mirror_feeds, "mirror")
 
+async def indexing_iqwiki(since: Optional[int] = None, until: Optional[int] = None):
+    await index_feed("IQ.Wiki", "iqwiki", since, until)
 
-def index_feed(fetch_function, feed_name):
-    since_date = datetime.datetime.now() - datetime.timedelta(days=180)
-    curr_date = datetime.datetime.now()
-    since_ts = int(since_date.timestamp())
-    curr_ts = int(curr_date.timestamp())
 
-    cursor = None
+async def indexing_mirror(since: Optional[int] = None, until: Optional[int] = None):
+    await index_feed("Mirror", "mirror", since, until)
+
+
+async def index_feed(platform, feed_name, since: Optional[int] = None, until: Optional[int] = None):
+    until_ts = until or int(datetime.datetime.now().timestamp())
+    if since is not None:
+        mode, since_ts = "backfill", since
+    else:
+        mode = "incremental"
+        watermark = await run_blocking("postgres", read_watermark, platform)
+        if watermark is None:
+            since_ts = int((datetime.datetime.now() - datetime.timedelta(days=settings.INDEX_WINDOW_DAYS)).timestamp())
+        else:
+            # feeds can show up a little after their timestamp; the record manager skips the ones seen before
+            since_ts = watermark - settings.INDEX_WATERMARK_OVERLAP
+
     logger.info(
-        f"Starting to index feed '{feed_name}' from " f"{since_date.strftime('%Y-%m-%d %H:%M:%S')} to" f" {curr_date.strftime('%Y-%m-%d %H:%M:%S')}"
+        f"Starting {mode} indexing of feed '{feed_name}' from "
+        f"{datetime.datetime.fromtimestamp(since_ts).strftime('%Y-%m-%d %H:%M:%S')} to"
+        f" {datetime.datetime.fromtimestamp(until_ts).strftime('%Y-%m-%d %H:%M:%S')}"
+    )
+    # connecting creates the collection and tables, so keep it off the event loop
+    await run_blocking("postgres", build_indexing_store)
+    # an unfinished crawl resumes with its own window, skipping the slices it already wrote
+    crawler = FeedCrawler(platform, since_ts, until_ts, mode)
+
+    async def write_page(page: Page):
+        await write_documents(page.docs, page.embedded)
+        await crawler.page_done(page)
+
+    # slices are fetched concurrently while earlier pages are split, embedded and written
+    pipeline = Pipeline(
+        feed_name,
+        [
+            Stage("split", split_records),
+            Stage("embed", embed_documents, concurrency=settings.INDEX_EMBED_CONCURRENCY),
+            Stage("write", write_page, concurrency=settings.INDEX_WRITE_CONCURRENCY),
+        ],
+        queue_size=settings.INDEX_QUEUE_SIZE,
     )
-    while True:
-        resp = fetch_function(since_ts, curr_ts, cursor=cursor)
-        if resp["meta"] is None:
-            logger.info(f"no meta in response, done with {feed_name}!")
-            break
-        cursor = resp["meta"]["cursor"]
-        logger.info(f"fetched {len(resp['data'])} records from {feed_name}," f" next cursor: {cursor}")
+    stats = await pipeline.run(crawler.pages())
+    if crawler.failed_slices:
+        logger.warning(f"{len(crawler.failed_slices)} slices of {feed_name} failed and will be crawled again on the next run")
+    return stats
+
+
+async def split_records(page: Page) -> Page:
+    page.docs = [doc for record in page.records for doc in build_docs(record)]
+    return page
+
 
-        records = resp.get("data", [])
-        if len(records) == 0:
-            break
+def record_key(doc: Document) -> str:
+    """
+    The key the record manager stores a document under, computed by langchain's index() itself.
 
-        save_records(records)
+    _HashedDocument is private to langchain_core, so this is the only place
+    that touches it; if it goes away, the import fails loudly instead of the
+    keys silently drifting and every document being embedded again.
+    """
+    return _HashedDocument.from_document(doc).uid
 
 
-def save_records(records):
-    docs = [build_docs(record) for record in records]
-    final_docs = [doc for sublist in docs for doc in sublist]
+async def embed_documents(page: Page) -> Page:
+    """Embed the chunks the record manager does not have yet, so the write stage only stores them."""
+    docs = page.docs
+    exists = await run_blocking("postgres", record_manager.exists, [record_key(doc) for doc in docs])
+    new_texts = list(dict.fromkeys(doc.page_content for doc, known in zip(docs, exists) if not known))
+    if new_texts:
+        embeddings = build_indexing_store().embeddings
+        embeddings.add(new_texts, await embeddings.embeddings.aembed_documents(new_texts))
+        page.embedded = new_texts
+    return page
+
+
+async def write_documents(docs: List[Document], embedded: Sequence[str] = ()):
+    """
+    :param embedded: Texts whose vectors the embed stage added for these documents, released once they are written
+    """
+    if docs:
+        await run_blocking("postgres", save_documents, docs, embedded)
+
+
+def save_documents(docs: List[Document], embedded: Sequence[str] = ()):
+    store = build_indexing_store()
     # index the documents
-    indexing_result = index(
-        final_docs,
-        record_manager,
-        build_vector_store(),
-        cleanup="incremental",
-        source_id_key="id",
-    )
+    try:
+        indexing_result = index(
+            docs,
+            record_manager,
+            store,
+            cleanup="incremental",
+            source_id_key="id",
+        )
+    finally:
+        store.embeddings.discard(embedded)
     logger.info(f"Indexing result: {indexing_result}")
 
 
@@ -90,6 +171,19 @@ def build_docs(record):
     return [Document(page_content=chunk, metadata={"id": record["id"], "full": record}) for chunk in chunks]
 
 
+def _timestamp(date: str) -> int:
+    return int(datetime.datetime.fromisoformat(date).timestamp())
+
+
 if __name__ == "__main__":
-    _clear()
-    build_index()
+    parser = argparse.ArgumentParser(description="Index the Mirror and IQ.Wiki feeds; by default only what is new since the last run")
+    parser.add_argument("--backfill", metavar="SINCE", type=_timestamp, help="re-crawl from this date (e.g. 2024-01-01) instead")
+    parser.add_argument("--until", type=_timestamp, help="end of the backfill, defaults to now")
+    parser.add_argument("--clear", action="store_true", help="delete the index, watermarks and unfinished crawls first, then index the whole window")
+    args = parser.parse_args()
+    if args.until and not args.backfill:
+        parser.error("--until requires --backfill")
+    if args.clear:
+        _clear()
+        reset_crawls()
+    build_index(args.backfill, args.until)
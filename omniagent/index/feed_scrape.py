@@ -1,56 +1,54 @@
+import asyncio
 import json
 
-import requests
 from loguru import logger
-from retrying import retry
 
 from omniagent.conf.env import settings
+from omniagent.executors.http_client import http_client
 
 
-def fetch_mirror_feeds(since_timestamp, until_timestamp, limit=10, cursor=None) -> dict:
+async def fetch_mirror_feeds(since_timestamp, until_timestamp, limit=10, cursor=None) -> dict:
     """
     Fetch feeds from Mirror.
     """
-    return fetch_feeds("Mirror", since_timestamp, until_timestamp, limit, cursor)
+    return await fetch_feeds("Mirror", since_timestamp, until_timestamp, limit, cursor)
 
 
-def fetch_iqwiki_feeds(since_timestamp, until_timestamp, limit=10, cursor=None) -> dict:
+async def fetch_iqwiki_feeds(since_timestamp, until_timestamp, limit=10, cursor=None) -> dict:
     """
     Fetch feeds from IQWiki.
     """
-    return fetch_feeds("IQ.Wiki", since_timestamp, until_timestamp, limit, cursor)
+    return await fetch_feeds("IQ.Wiki", since_timestamp, until_timestamp, limit, cursor)
 
 
-def fetch_feeds(platform, since_timestamp, until_timestamp, limit=10, cursor=None, max_retries=3) -> dict:
+async def fetch_feeds(platform, since_timestamp, until_timestamp, limit=10, cursor=None, max_retries=3) -> dict:
     """
     Fetch feeds from a platform with retry functionality.
     """
-
-    @retry(stop_max_attempt_number=max_retries)
-    def _fetch_feeds():
-        cursor_str = f"&cursor={cursor}" if cursor else ""
-        url = (
-            f"{settings.RSS3_DATA_API}/decentralized/platform/{platform}?limit={limit}"
-            f"&action_limit=10&since_timestamp={since_timestamp}&type=post&"
-            f"until_timestamp={until_timestamp}{cursor_str}"
-        )
-        payload = {}  # type: ignore
-        headers = {}  # type: ignore
-
-        response = requests.request("GET", url, headers=headers, data=payload)
-
-        if response.status_code != 200:
-            raise Exception(f"Failed to fetch feeds: {response.text}")
-
-        return json.loads(response.text)
-
     try:
-        return _fetch_feeds()
+        return await fetch_feed_page(platform, since_timestamp, until_timestamp, limit, cursor, max_retries)
     except Exception as e:
         logger.error(f"Failed to fetch feeds from {platform}: {e}")
         return {}
 
 
+async def fetch_feed_page(platform, since_timestamp, until_timestamp, limit=10, cursor=None, max_retries=3) -> dict:
+    """
+    Fetch one page of feeds from a platform, raising on failure so callers can tell an error from the end of the feed.
+    """
+    cursor_str = f"&cursor={cursor}" if cursor else ""
+    url = (
+        f"{settings.RSS3_DATA_API}/decentralized/platform/{platform}?limit={limit}"
+        f"&action_limit=10&since_timestamp={since_timestamp}&type=post&"
+        f"until_timestamp={until_timestamp}{cursor_str}"
+    )
+
+    response = await http_client.get(url, retries=max_retries)
+    if response.status != 200:
+        raise Exception(f"Failed to fetch feeds: {response.text}")
+    return response.json()
+
+
 if __name__ == "__main__":
-    feeds = fetch_feeds("Mirror", 0, 0, 1, None, 3)
+    feeds = asyncio.run(fetch_feeds("Mirror", 0, 0, 1, None, 3))
     print(json.dumps(feeds, ensure_ascii=False))
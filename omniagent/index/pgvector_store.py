@@ -1,4 +1,9 @@
+import functools
+import threading
+from typing import Dict, List, Sequence
+
 from dotenv import load_dotenv
+from langchain_core.embeddings import Embeddings
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_google_vertexai import VertexAIEmbeddings
 from langchain_openai import OpenAIEmbeddings
@@ -6,22 +11,98 @@ from langchain_postgres.vectorstores import PGVector
 from toolz import memoize
 
 from omniagent.conf.env import settings
+from omniagent.index.embedding_cache import CachedEmbeddings, embedding_model_name
+from omniagent.index.embedding_executor import BatchedEmbeddings
 
 load_dotenv()
 
 
 @memoize
-def build_vector_store() -> PGVector:
-    collection_name = "backend"
+def build_embeddings() -> Embeddings:
+    provider = build_provider_embeddings()
+    embeddings = BatchedEmbeddings(provider)
+    return CachedEmbeddings(embeddings, embedding_model_name(provider)) if settings.EMBEDDING_CACHE_ENABLED else embeddings
+
+
+def build_provider_embeddings() -> Embeddings:
+    # BatchedEmbeddings retries rate limited requests itself, and needs to see the 429s to slow down
     if settings.VERTEX_PROJECT_ID:
-        underlying_embeddings = VertexAIEmbeddings(model_name="textembedding-gecko@003", project=settings.VERTEX_PROJECT_ID)
+        return VertexAIEmbeddings(model_name="textembedding-gecko@003", project=settings.VERTEX_PROJECT_ID, max_retries=0)
 
     elif settings.GOOGLE_GEMINI_API_KEY:
-        underlying_embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001", google_api_key=settings.GOOGLE_GEMINI_API_KEY)
+        return without_retries(GoogleGenerativeAIEmbeddings(model="models/embedding-001", google_api_key=settings.GOOGLE_GEMINI_API_KEY))
     else:
-        underlying_embeddings = OpenAIEmbeddings(model="text-embedding-3-large")
+        return OpenAIEmbeddings(model="text-embedding-3-large", max_retries=0)
+
+
+def without_retries(embeddings: GoogleGenerativeAIEmbeddings) -> GoogleGenerativeAIEmbeddings:
+    # the wrapper has no retry option, so turn off the retries of the client's own calls
+    client = embeddings.client
+    client.batch_embed_contents = functools.partial(client.batch_embed_contents, retry=None)
+    client.embed_content = functools.partial(client.embed_content, retry=None)
+    return embeddings
+
+
+@memoize
+def build_vector_store(collection_name: str = "backend") -> PGVector:
+    return PGVector(
+        embeddings=build_embeddings(),
+        collection_name=collection_name,
+        connection=settings.DB_CONNECTION,
+        use_jsonb=True,
+    )
+
+
+class PrecomputedEmbeddings(Embeddings):
+    """
+    Embeddings that returns vectors computed ahead of time, and embeds anything else itself.
+
+    Lets an indexing pipeline embed documents in its own stage and then hand
+    them to langchain's index(), which calls embed_documents again when it
+    writes to the vector store.
+    """
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+        self._lock = threading.Lock()
+        self._vectors: Dict[str, List[float]] = {}
+        self._references: Dict[str, int] = {}
+
+    def add(self, texts: Sequence[str], vectors: Sequence[List[float]]):
+        """Keep vectors until each add of a text has been matched by a discard, so concurrent pages sharing a chunk keep it."""
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                self._vectors[text] = vector
+                self._references[text] = self._references.get(text, 0) + 1
+
+    def discard(self, texts: Sequence[str]):
+        with self._lock:
+            for text in texts:
+                remaining = self._references.get(text, 0) - 1
+                if remaining > 0:
+                    self._references[text] = remaining
+                else:
+                    self._references.pop(text, None)
+                    self._vectors.pop(text, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            vectors = [self._vectors.get(text) for text in texts]
+        missing = [text for text, vector in zip(texts, vectors) if vector is None]
+        if missing:
+            computed = iter(self.embeddings.embed_documents(missing))
+            vectors = [vector if vector is not None else next(computed) for vector in vectors]
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+
+@memoize
+def build_indexing_store(collection_name: str = "backend") -> PGVector:
+    """A vector store for indexing pipelines, whose embeddings (a PrecomputedEmbeddings) can be filled ahead of writes."""
     return PGVector(
-        embeddings=underlying_embeddings,
+        embeddings=PrecomputedEmbeddings(build_embeddings()),
         collection_name=collection_name,
         connection=settings.DB_CONNECTION,
         use_jsonb=True,
@@ -0,0 +1,127 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    """
+    One step of a pipeline.
+
+    :param name: Used in the stats
+    :param func: Receives one item and returns the item for the next stage, or None to drop it
+    :param concurrency: Workers running func at the same time; items may then leave the stage out of order
+    """
+
+    name: str
+    func: Callable[[Any], Awaitable[Optional[Any]]]
+    concurrency: int = 1
+
+
+@dataclass
+class StageStats:
+    items: int = 0
+    busy_seconds: float = 0.0
+    # time spent waiting for input (starved) and for room downstream (backpressure)
+    starved_seconds: float = 0.0
+    blocked_seconds: float = 0.0
+    max_queue_depth: int = 0
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = max(time.perf_counter() - self._started, 1e-9)
+        return {
+            "items": self.items,
+            "items_per_second": round(self.items / elapsed, 2),
+            "busy_seconds": round(self.busy_seconds, 2),
+            "starved_seconds": round(self.starved_seconds, 2),
+            "blocked_seconds": round(self.blocked_seconds, 2),
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+
+class Pipeline:
+    """
+    Streams items from a source through stages connected by bounded queues.
+
+    Every stage runs at the same time as the others, so while one item is in
+    a slow stage the source and the earlier stages already work on the next
+    ones. A full queue makes its upstream wait, which bounds memory and shows
+    up in the stats as backpressure: a stage with high blocked_seconds is
+    waiting on a slower stage after it, and one with high starved_seconds on
+    a slower stage before it. The first error cancels the whole pipeline.
+    """
+
+    def __init__(self, name: str, stages: List[Stage], queue_size: int = 4):
+        self.name = name
+        self.stages = stages
+        self.queue_size = queue_size
+        self.stats: Dict[str, StageStats] = {}
+
+    async def run(self, source: AsyncIterable[Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        :param source: Items for the first stage; it is only read as fast as the pipeline drains
+        :return: Per-stage stats, keyed by stage name, with "source" for the source
+        """
+        self.stats = {"source": StageStats(), **{stage.name: StageStats() for stage in self.stages}}
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        tasks = [asyncio.create_task(self._produce(source, queues[0]))]
+        for position, stage in enumerate(self.stages):
+            inbox = queues[position]
+            outbox = queues[position + 1] if position + 1 < len(queues) else None
+            remaining = [stage.concurrency]
+            tasks += [asyncio.create_task(self._work(stage, inbox, outbox, remaining)) for _ in range(stage.concurrency)]
+
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        summary = {name: stats.summary() for name, stats in self.stats.items()}
+        for name, stage_summary in summary.items():
+            logger.info(f"Pipeline {self.name} stage {name}: {stage_summary}")
+        return summary
+
+    async def _produce(self, source: AsyncIterable[Any], outbox: asyncio.Queue):
+        stats = self.stats["source"]
+        started = time.perf_counter()
+        async for item in source:
+            stats.busy_seconds += time.perf_counter() - started
+            stats.items += 1
+            await self._put(stats, outbox, item)
+            started = time.perf_counter()
+        await outbox.put(_DONE)
+
+    async def _work(self, stage: Stage, inbox: asyncio.Queue, outbox: Optional[asyncio.Queue], remaining: List[int]):
+        stats = self.stats[stage.name]
+        while True:
+            started = time.perf_counter()
+            item = await inbox.get()
+            stats.starved_seconds += time.perf_counter() - started
+            if item is _DONE:
+                # let the stage's other workers see the end too; the last one tells the next stage
+                await inbox.put(_DONE)
+                remaining[0] -= 1
+                if remaining[0] == 0 and outbox is not None:
+                    await outbox.put(_DONE)
+                return
+
+            stats.max_queue_depth = max(stats.max_queue_depth, inbox.qsize() + 1)
+            started = time.perf_counter()
+            result = await stage.func(item)
+            stats.busy_seconds += time.perf_counter() - started
+            stats.items += 1
+            if result is not None and outbox is not None:
+                await self._put(stats, outbox, result)
+
+    @staticmethod
+    async def _put(stats: StageStats, outbox: asyncio.Queue, item: Any):
+        started = time.perf_counter()
+        await outbox.put(item)
+        stats.blocked_seconds += time.perf_counter() - started
@@ -0,0 +1,112 @@
+from typing import Optional
+
+from omniagent.metrics.prometheus import registry
+
+REQUEST_LATENCY = registry.histogram(
+    "omniagent_request_duration_seconds",
+    "Chat completion latency from admission to the last byte, per model",
+    ["model", "stream"],
+)
+TIME_TO_FIRST_TOKEN = registry.histogram(
+    "omniagent_time_to_first_token_seconds",
+    "Time from admission to the first answer token, per model",
+    ["model", "stream"],
+)
+SUPERVISOR_LATENCY = registry.histogram(
+    "omniagent_supervisor_duration_seconds",
+    "Time the supervisor takes to pick the next agents, by the router that decided",
+    ["router"],
+)
+NODE_LATENCY = registry.histogram(
+    "omniagent_node_duration_seconds",
+    "Agent node latency, including its LLM turns and tool calls",
+    ["node"],
+)
+TOOL_LATENCY = registry.histogram(
+    "omniagent_tool_duration_seconds",
+    "Tool (executor) call latency by outcome",
+    ["tool", "outcome"],
+)
+TOOL_CALLS = registry.counter(
+    "omniagent_tool_calls_total",
+    "Tool (executor) calls by outcome: ok, error or timeout",
+    ["tool", "outcome"],
+)
+UPSTREAM_LATENCY = registry.histogram(
+    "omniagent_upstream_request_duration_seconds",
+    "Latency of each HTTP attempt to an upstream API, per host and status class",
+    ["host", "status"],
+)
+EXECUTOR_CACHE = registry.counter(
+    "omniagent_executor_cache_requests_total",
+    "Executor result cache lookups by cache and result: hit, miss, coalesced (joined an in-flight load) or persistent_hit",
+    ["cache", "result"],
+)
+EMBEDDING_CACHE = registry.counter(
+    "omniagent_embedding_cache_texts_total",
+    "Texts looked up in the embedding cache per model, by result: hit (embedding call saved) or miss",
+    ["model", "result"],
+)
+EMBEDDING_TEXTS = registry.counter(
+    "omniagent_embedding_texts_total",
+    "Texts embedded by the provider, per provider; its rate is the embedding throughput",
+    ["provider"],
+)
+EMBEDDING_BATCH_LATENCY = registry.histogram(
+    "omniagent_embedding_batch_duration_seconds",
+    "Latency of each embedding request per provider, by outcome: ok or error",
+    ["provider", "outcome"],
+)
+EMBEDDING_IN_FLIGHT = registry.gauge(
+    "omniagent_embedding_requests_in_flight",
+    "Embedding requests currently in flight per provider",
+    ["provider"],
+)
+TOKEN_LIST_REFRESH = registry.histogram(
+    "omniagent_token_list_refresh_seconds",
+    "Time to download and index the li.quest token list, by outcome: ok or error",
+    ["outcome"],
+)
+TOKEN_LIST_FETCHED = registry.gauge(
+    "omniagent_token_list_fetched_timestamp_seconds",
+    "Unix time the token list being served was fetched; its age is time() minus this",
+)
+LLM_TOKENS = registry.counter(
+    "omniagent_llm_tokens_total",
+    "LLM tokens by graph node and direction (prompt or completion)",
+    ["node", "type"],
+)
+PROMPT_CACHE_TOKENS = registry.counter(
+    "omniagent_prompt_cache_tokens_total",
+    "Prompt tokens per provider by prompt cache result: hit (read from cache), write (added to cache) or miss",
+    ["provider", "result"],
+)
+UI_TURN_SETUP = registry.histogram(
+    "omniagent_ui_turn_setup_seconds",
+    "Per-message overhead in the chat UI before the workflow runs, by whether the session's runnable was reused or rebuilt",
+    ["runnable"],
+)
+ADMISSION_RUNNING = registry.gauge(
+    "omniagent_admission_running",
+    "Workflows currently running per model",
+    ["model"],
+)
+ADMISSION_QUEUE_DEPTH = registry.gauge(
+    "omniagent_admission_queue_depth",
+    "Requests waiting for a slot per model and lane",
+    ["model", "lane"],
+)
+ADMISSION_WAIT = registry.histogram(
+    "omniagent_admission_wait_seconds",
+    "Time requests wait for a slot per model and lane",
+    ["model", "lane"],
+)
+ADMISSION_REJECTED = registry.counter(
+    "omniagent_admission_rejected_total",
+    "Requests turned away with a 429 per model",
+    ["model"],
+)
+
+
+def status_class(status: Optional[int]) -> str:
+    return f"{status // 100}xx" if status else "error"
@@ -0,0 +1,137 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import BaseMessage, get_buffer_string
+from langchain_core.outputs import LLMResult
+
+from omniagent.executors.thread_pools import run_blocking
+from omniagent.metrics.instruments import LLM_TOKENS, PROMPT_CACHE_TOKENS
+from omniagent.metrics.tokenizers import tokenizer_registry
+
+NO_NODE = "none"
+ANTHROPIC_CACHE_KEYS = ("cache_read_input_tokens", "cache_creation_input_tokens")
+
+
+@dataclass
+class NodeUsage:
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+
+def count_tokens(model: str, prompt: str, completion: str) -> Tuple[int, int]:
+    return tokenizer_registry.count(model, prompt), tokenizer_registry.count(model, completion)
+
+
+def provider_usage(response: LLMResult) -> Optional[Tuple[int, int]]:
+    """Prompt and completion tokens as reported by the provider, if it reported them."""
+    prompt = completion = 0
+    found = False
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            usage = getattr(message, "usage_metadata", None)
+            info = generation.generation_info or {}
+            if usage:
+                # Anthropic reports cached prompt tokens apart from input_tokens
+                metadata = getattr(message, "response_metadata", None) or {}
+                prompt += usage.get("input_tokens", 0) + sum(metadata.get(key) or 0 for key in ANTHROPIC_CACHE_KEYS)
+                completion += usage.get("output_tokens", 0)
+                found = True
+            elif "prompt_eval_count" in info or "eval_count" in info:
+                # Ollama's native counters, for client versions that do not map them to usage_metadata
+                prompt += info.get("prompt_eval_count") or 0
+                completion += info.get("eval_count") or 0
+                found = True
+    return (prompt, completion) if found else None
+
+
+def prompt_cache_usage(response: LLMResult) -> Optional[Tuple[int, int]]:
+    """Prompt tokens read from and written to the provider's prompt cache, if it reported them."""
+    read = written = 0
+    found = False
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "response_metadata", None) or {}
+            if ANTHROPIC_CACHE_KEYS[0] in metadata:
+                read += metadata.get("cache_read_input_tokens") or 0
+                written += metadata.get("cache_creation_input_tokens") or 0
+                found = True
+    # OpenAI caches prefixes automatically and only reports the tokens it read
+    details = ((response.llm_output or {}).get("token_usage") or {}).get("prompt_tokens_details") or {}
+    if details.get("cached_tokens") is not None:
+        read += details["cached_tokens"]
+        found = True
+    return (read, written) if found else None
+
+
+class TokenUsageCollector(AsyncCallbackHandler):
+    """
+    Collect token usage of every LLM call in one workflow run, per graph node.
+
+    Provider-reported usage is used when available; otherwise prompt and
+    completion are counted with the local tokenizer for the model. Counts are
+    also added to the omniagent_llm_tokens_total metric, and prompt cache hits
+    to omniagent_prompt_cache_tokens_total for providers that report them.
+    """
+
+    def __init__(self):
+        self.nodes: Dict[str, NodeUsage] = {}
+        self._runs: Dict[UUID, Tuple[str, str, str, List[BaseMessage]]] = {}
+
+    async def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[BaseMessage]],
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        metadata = metadata or {}
+        model = metadata.get("ls_model_name") or kwargs.get("invocation_params", {}).get("model") or ""
+        node = metadata.get("langgraph_node", NO_NODE)
+        self._runs[run_id] = (node, metadata.get("ls_provider", "unknown"), model, messages[0] if messages else [])
+
+    async def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        node, provider, model, messages = run
+
+        counted = provider_usage(response)
+        if counted is None:
+            completion_text = "".join(generation.text for generations in response.generations for generation in generations)
+            # loading a tokenizer can download its vocabulary, so count off the event loop
+            counted = await run_blocking("tokenizer", count_tokens, model, get_buffer_string(messages), completion_text)
+
+        prompt, completion = counted
+        usage = self.nodes.setdefault(node, NodeUsage())
+        usage.prompt_tokens += prompt
+        usage.completion_tokens += completion
+        LLM_TOKENS.inc(prompt, node=node, type="prompt")
+        LLM_TOKENS.inc(completion, node=node, type="completion")
+
+        cache = prompt_cache_usage(response)
+        if cache is not None:
+            read, written = cache
+            usage.cached_tokens += read
+            PROMPT_CACHE_TOKENS.inc(read, provider=provider, result="hit")
+            PROMPT_CACHE_TOKENS.inc(written, provider=provider, result="write")
+            PROMPT_CACHE_TOKENS.inc(max(prompt - read - written, 0), provider=provider, result="miss")
+
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._runs.pop(run_id, None)
+
+    def total(self) -> NodeUsage:
+        return NodeUsage(
+            prompt_tokens=sum(usage.prompt_tokens for usage in self.nodes.values()),
+            completion_tokens=sum(usage.completion_tokens for usage in self.nodes.values()),
+            cached_tokens=sum(usage.cached_tokens for usage in self.nodes.values()),
+        )
@@ -0,0 +1,89 @@
+import re
+import threading
+from typing import Callable, Dict, List, Tuple
+
+from loguru import logger
+
+Tokenizer = Callable[[str], int]
+
+
+def approximate_tokens(text: str) -> int:
+    """Rough count for when no tokenizer can be loaded: about four characters per token for English BPE vocabularies."""
+    return (len(text) + 3) // 4
+
+
+def tiktoken_tokenizer(encoding_name: str) -> Callable[[], Tokenizer]:
+    def load() -> Tokenizer:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding(encoding_name)
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+    return load
+
+
+class TokenizerRegistry:
+    """
+    Local token counters keyed by model name pattern.
+
+    Used when a provider does not report usage itself. Patterns registered
+    later take precedence, so deployments can plug in an exact tokenizer for
+    a model (e.g. a Hugging Face tokenizer for an Ollama model) without
+    touching the defaults. A tokenizer that fails to load, for example because
+    tiktoken cannot download its encoding, falls back to approximate_tokens.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._factories: List[Tuple[re.Pattern, Callable[[], Tokenizer]]] = []
+        self._loaded: Dict[str, Tokenizer] = {}
+
+    def register(self, pattern: str, factory: Callable[[], Tokenizer]):
+        """
+        :param pattern: Regular expression matched against the start of the model name
+        :param factory: Returns the tokenizer; called once, on first use
+        """
+        with self._lock:
+            self._factories.insert(0, (re.compile(pattern), factory))
+            self._loaded.clear()
+
+    def get(self, model: str) -> Tokenizer:
+        with self._lock:
+            tokenizer = self._loaded.get(model)
+            if tokenizer is None:
+                tokenizer = self._load(model)
+                self._loaded[model] = tokenizer
+            return tokenizer
+
+    def preload(self):
+        """Load every registered tokenizer once, so a download (tiktoken fetches its encodings on first use) happens now."""
+        with self._lock:
+            factories = [factory for _, factory in self._factories]
+        for factory in factories:
+            _preload(factory)
+
+    def count(self, model: str, text: str) -> int:
+        return self.get(model)(text) if text else 0
+
+    def _load(self, model: str) -> Tokenizer:
+        for pattern, factory in self._factories:
+            if pattern.match(model):
+                try:
+                    return factory()
+                except Exception as e:
+                    logger.warning(f"Tokenizer for {model} unavailable, approximating token counts: {e}")
+                    break
+        return approximate_tokens
+
+
+def _preload(factory: Callable[[], Tokenizer]):
+    try:
+        factory()
+    except Exception as e:
+        logger.warning(f"Failed to preload a tokenizer, token counts will be approximated: {e}")
+
+
+tokenizer_registry = TokenizerRegistry()
+# most open models served through Ollama use BPE vocabularies close enough to cl100k for capacity planning
+tokenizer_registry.register(r".*", tiktoken_tokenizer("cl100k_base"))
+tokenizer_registry.register(r"(gpt-4o|chatgpt-4o|o1)", tiktoken_tokenizer("o200k_base"))
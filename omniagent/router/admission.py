@@ -0,0 +1,219 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass
+from typing import Deque, Dict, Optional
+
+from loguru import logger
+
+from omniagent.conf.env import settings
+from omniagent.metrics.instruments import ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTED, ADMISSION_RUNNING, ADMISSION_WAIT
+
+ANONYMOUS = "anonymous"
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+
+class QueueFullError(Exception):
+    def __init__(self, model: str, retry_after: int):
+        super().__init__(f"Too many concurrent requests for {model}, retry in {retry_after}s")
+        self.model = model
+        self.retry_after = retry_after
+
+
+@dataclass
+class AdmissionStats:
+    limit: int
+    running: int = 0
+    queued: int = 0
+    queued_batch: int = 0
+    admitted: int = 0
+    rejected: int = 0
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+    avg_run_seconds: float = 0.0
+
+
+class Ticket:
+    """A granted slot; release it exactly once when the request finishes."""
+
+    def __init__(self, controller: "AdmissionController", model: str):
+        self._controller = controller
+        self._model = model
+        self._started = time.monotonic()
+        self._released = False
+
+    def release(self):
+        if self._released:
+            return
+        self._released = True
+        self._controller._release(self._model, time.monotonic() - self._started)
+
+
+class _FairQueue:
+    def __init__(self):
+        # user -> waiting futures; popping the first user and re-appending it gives round-robin order
+        self.waiters: OrderedDict[str, Deque[asyncio.Future]] = OrderedDict()
+        self.size = 0
+
+    def push(self, user: str, waiter: asyncio.Future):
+        self.waiters.setdefault(user, deque()).append(waiter)
+        self.size += 1
+
+    def pop(self) -> Optional[asyncio.Future]:
+        while self.waiters:
+            user, queue = self.waiters.popitem(last=False)
+            waiter = queue.popleft()
+            if queue:
+                self.waiters[user] = queue
+            self.size -= 1
+            if not waiter.done():
+                return waiter
+        return None
+
+    def discard(self, user: str, waiter: asyncio.Future):
+        queue = self.waiters.get(user)
+        if queue and waiter in queue:
+            queue.remove(waiter)
+            self.size -= 1
+            if not queue:
+                del self.waiters[user]
+
+
+class _ModelQueue:
+    def __init__(self, model: str, limit: int):
+        self.model = model
+        self.stats = AdmissionStats(limit=limit)
+        # batch waiters only get a slot when no interactive request is waiting
+        self.lanes: Dict[str, _FairQueue] = {INTERACTIVE: _FairQueue(), BATCH: _FairQueue()}
+
+    def has_waiters(self) -> bool:
+        return any(lane.size for lane in self.lanes.values())
+
+    def pop(self) -> Optional[asyncio.Future]:
+        for lane in self.lanes.values():
+            waiter = lane.pop()
+            if waiter is not None:
+                return waiter
+        return None
+
+    def update_stats(self):
+        self.stats.queued = self.lanes[INTERACTIVE].size
+        self.stats.queued_batch = self.lanes[BATCH].size
+        ADMISSION_RUNNING.set(self.stats.running, model=self.model)
+        for name, lane in self.lanes.items():
+            ADMISSION_QUEUE_DEPTH.set(lane.size, model=self.model, lane=name)
+
+
+class AdmissionController:
+    """
+    Per-model concurrency caps with a bounded, user-fair wait queue.
+
+    Each model runs at most its configured number of workflows at once.
+    Requests beyond that wait in a queue that hands freed slots to users in
+    round-robin order, so one client sending a burst cannot starve the others.
+    Once the queue is full, new requests are rejected immediately with a
+    Retry-After estimate instead of piling onto the shared upstreams.
+
+    Batch work waits in a separate, unbounded lane that is only served when
+    no interactive request is waiting.
+    """
+
+    def __init__(self):
+        self._queues: Dict[str, _ModelQueue] = {}
+
+    def _queue(self, model: str) -> _ModelQueue:
+        queue = self._queues.get(model)
+        if queue is None:
+            limit = settings.ADMISSION_MODEL_CONCURRENCY.get(model, settings.ADMISSION_MAX_CONCURRENCY)
+            queue = self._queues[model] = _ModelQueue(model, limit)
+        return queue
+
+    async def acquire(self, model: str, user: Optional[str] = None, priority: str = INTERACTIVE) -> Ticket:
+        """
+        Wait for a slot to run a workflow for `model`.
+
+        :param model: The requested model; each model has its own limit and queue
+        :param user: The API user, used for fair scheduling between clients
+        :param priority: INTERACTIVE, or BATCH for offline work that waits as long as it takes
+        :return: A ticket that must be released when the request finishes
+        :raises QueueFullError: If the wait queue is full or the slot is not granted within ADMISSION_QUEUE_TIMEOUT
+        """
+        queue = self._queue(model)
+        stats = queue.stats
+        if stats.running < stats.limit and not queue.has_waiters():
+            stats.running += 1
+            queue.update_stats()
+            self._record_admission(queue, priority, 0.0)
+            return Ticket(self, model)
+
+        lane = queue.lanes[priority]
+        if priority == INTERACTIVE and lane.size >= settings.ADMISSION_MAX_QUEUE:
+            stats.rejected += 1
+            ADMISSION_REJECTED.inc(model=model)
+            raise QueueFullError(model, self._retry_after(stats))
+
+        user = user or ANONYMOUS
+        waiter = asyncio.get_running_loop().create_future()
+        lane.push(user, waiter)
+        queue.update_stats()
+        enqueued = time.monotonic()
+        timeout = settings.ADMISSION_QUEUE_TIMEOUT if priority == INTERACTIVE else None
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=timeout)
+        except asyncio.TimeoutError:
+            lane.discard(user, waiter)
+            queue.update_stats()
+            if not waiter.done():
+                waiter.cancel()
+                stats.rejected += 1
+                ADMISSION_REJECTED.inc(model=model)
+                logger.warning(f"Admission wait for {model} timed out after {settings.ADMISSION_QUEUE_TIMEOUT}s")
+                raise QueueFullError(model, self._retry_after(stats)) from None
+        except asyncio.CancelledError:
+            lane.discard(user, waiter)
+            queue.update_stats()
+            if waiter.done() and not waiter.cancelled():
+                # the slot was handed to us just as the client went away; pass it on
+                self._release(model, None)
+            else:
+                waiter.cancel()
+            raise
+
+        self._record_admission(queue, priority, time.monotonic() - enqueued)
+        return Ticket(self, model)
+
+    def _release(self, model: str, run_seconds: Optional[float]):
+        queue = self._queues[model]
+        stats = queue.stats
+        if run_seconds is not None:
+            # exponential moving average, used for Retry-After estimates
+            stats.avg_run_seconds = run_seconds if not stats.avg_run_seconds else 0.8 * stats.avg_run_seconds + 0.2 * run_seconds
+
+        waiter = queue.pop()
+        if waiter is None:
+            stats.running -= 1
+        queue.update_stats()
+        if waiter is None:
+            return
+        # hand the slot straight to the next waiter; `running` stays the same
+        waiter.set_result(True)
+
+    def _record_admission(self, queue: _ModelQueue, lane: str, waited: float):
+        ADMISSION_WAIT.observe(waited, model=queue.model, lane=lane)
+        stats = queue.stats
+        stats.admitted += 1
+        stats.total_wait_seconds += waited
+        stats.max_wait_seconds = max(stats.max_wait_seconds, waited)
+
+    def _retry_after(self, stats: AdmissionStats) -> int:
+        per_slot = stats.avg_run_seconds or 1.0
+        return max(1, math.ceil(per_slot * (stats.queued + 1) / max(stats.limit, 1)))
+
+    def stats(self) -> Dict[str, Dict]:
+        return {model: asdict(queue.stats) for model, queue in self._queues.items()}
+
+
+admission_controller = AdmissionController()
@@ -0,0 +1,143 @@
+import json
+import time
+import uuid
+from datetime import datetime
+from typing import Annotated, Any, Dict, List, Optional
+
+from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+
+from omniagent.batch.store import create_batch, get_batch, iter_results
+from omniagent.conf.env import settings
+from omniagent.conf.llm_provider import get_available_providers
+from omniagent.executors.thread_pools import run_blocking
+from omniagent.router.openai import ChatCompletionRequest
+
+router = APIRouter(tags=["Batch"])
+
+
+class BatchRequestCounts(BaseModel):
+    total: int
+    completed: int
+    failed: int
+    running: int
+
+
+class BatchThroughput(BaseModel):
+    items_per_minute: Optional[float] = None
+    eta_seconds: Optional[int] = None
+
+
+class BatchObject(BaseModel):
+    id: str
+    object: str = "batch"
+    endpoint: str = "/v1/chat/completions"
+    status: str = Field(example="in_progress", description="queued, in_progress or completed")
+    created_at: int
+    started_at: Optional[int] = None
+    finished_at: Optional[int] = None
+    request_counts: BatchRequestCounts
+    throughput: BatchThroughput
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+
+
+def parse_batch_file(content: bytes) -> List[Dict[str, Any]]:
+    """
+    Parse and validate an uploaded JSONL batch.
+
+    Each line is either a bare ChatCompletionRequest, or an OpenAI batch line
+    of the form {"custom_id": ..., "body": {...}}.
+    """
+    providers = get_available_providers()
+    items = []
+    for number, raw in enumerate(content.decode("utf-8").splitlines(), start=1):
+        if not raw.strip():
+            continue
+        try:
+            line = json.loads(raw)
+            body = line.get("body", line)
+            request = ChatCompletionRequest(**body)
+        except (json.JSONDecodeError, AttributeError, TypeError, ValidationError) as err:
+            raise HTTPException(status_code=400, detail={"error": f"Line {number} is not a valid chat completion request: {err}"}) from err
+        if request.model not in providers:
+            raise HTTPException(status_code=400, detail={"error": f"Line {number} uses unknown model {request.model}"})
+
+        request.stream = False
+        items.append({"custom_id": str(line.get("custom_id") or f"line-{number}"), "model": request.model, "request": request.dict()})
+
+    if not items:
+        raise HTTPException(status_code=400, detail={"error": "The batch file contains no requests"})
+    if len(items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail={"error": f"A batch may contain at most {settings.BATCH_MAX_ITEMS} requests"})
+    return items
+
+
+def _timestamp(value: Optional[datetime]) -> Optional[int]:
+    return int(value.timestamp()) if value else None
+
+
+def build_batch_object(batch: Dict[str, Any]) -> BatchObject:
+    done = batch["completed"] + batch["failed"]
+    throughput = BatchThroughput()
+    if batch["started_at"] and done:
+        end = batch["finished_at"].timestamp() if batch["finished_at"] else time.time()
+        elapsed = max(end - batch["started_at"].timestamp(), 1e-3)
+        throughput.items_per_minute = round(done / elapsed * 60, 2)
+        throughput.eta_seconds = int((batch["total"] - done) / (done / elapsed))
+
+    return BatchObject(
+        id=str(batch["id"]),
+        status=batch["status"],
+        created_at=_timestamp(batch["created_at"]),
+        started_at=_timestamp(batch["started_at"]),
+        finished_at=_timestamp(batch["finished_at"]),
+        request_counts=BatchRequestCounts(total=batch["total"], completed=batch["completed"], failed=batch["failed"], running=batch["running"]),
+        throughput=throughput,
+        metadata=batch["metadata"] or {},
+    )
+
+
+async def load_batch(batch_id: uuid.UUID) -> Dict[str, Any]:
+    batch = await run_blocking("postgres", get_batch, batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail={"error": f"Batch {batch_id} not found"})
+    return batch
+
+
+@router.post(
+    "/v1/batches",
+    summary="Create a batch of chat completions",
+    description="""Queue a JSONL file of chat completion requests for offline processing.
+    Each line is a chat completion request, or an OpenAI batch line with `custom_id` and `body`.
+    Batches run in the background at lower priority than interactive requests.""",
+    response_model=BatchObject,
+)
+async def create_batch_job(file: Annotated[UploadFile, File(description="JSONL file with one chat completion request per line")]):
+    if not settings.BATCH_ENABLED:
+        raise HTTPException(status_code=503, detail={"error": "Batch processing is disabled on this server"})
+    items = parse_batch_file(await file.read())
+    batch_id = await run_blocking("postgres", create_batch, items, {"filename": file.filename})
+    return build_batch_object(await load_batch(batch_id))
+
+
+@router.get(
+    "/v1/batches/{batch_id}",
+    summary="Retrieve a batch",
+    description="Progress and throughput of a batch.",
+    response_model=BatchObject,
+)
+async def retrieve_batch(batch_id: uuid.UUID):
+    return build_batch_object(await load_batch(batch_id))
+
+
+@router.get(
+    "/v1/batches/{batch_id}/output",
+    summary="Download batch results",
+    description="""The finished requests of a batch as JSONL, in input order.
+    Each line has the `custom_id`, and either the chat completion `response` or an `error`.""",
+)
+async def batch_output(batch_id: uuid.UUID):
+    await load_batch(batch_id)
+    # the generator reads from the database; Starlette iterates sync generators in its thread pool
+    return StreamingResponse(iter_results(batch_id), media_type="application/jsonl")
@@ -0,0 +1,97 @@
+import asyncio
+from contextlib import aclosing, asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import Request
+from langchain_core.callbacks import BaseCallbackHandler
+from loguru import logger
+
+DISCONNECT_POLL_INTERVAL = 1.0
+
+
+class DeadlineExceededError(Exception):
+    def __init__(self, partial_state: Optional[Dict[str, Any]] = None):
+        super().__init__("Deadline exceeded")
+        self.partial_state = partial_state
+
+
+def request_deadline(timeout: Optional[float]) -> Optional[float]:
+    """Turn a relative timeout in seconds, e.g. from the X-Request-Timeout header, into an event loop deadline."""
+    if timeout is None or timeout <= 0:
+        return None
+    return asyncio.get_running_loop().time() + timeout
+
+
+async def workflow_events(
+    agent, inputs: Dict[str, Any], deadline: Optional[float] = None, callbacks: Optional[List[BaseCallbackHandler]] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream a workflow's events, cancelling the whole run if the consumer stops or the deadline passes.
+
+    Uses the v2 event stream, which cancels the graph task when the stream is
+    closed; that in turn cancels running nodes and any tool HTTP requests they
+    are awaiting. The v1 stream waits for the graph to finish instead.
+
+    :param callbacks: Extra callback handlers for the run, e.g. a TokenUsageCollector
+    :raises DeadlineExceededError: When the deadline passes before the run completes
+    """
+    async with aclosing(agent.astream_events(inputs, config={"callbacks": callbacks or []}, version="v2")) as events:
+        while True:
+            timeout = asyncio.timeout_at(deadline)
+            try:
+                async with timeout:
+                    event = await events.__anext__()
+            except StopAsyncIteration:
+                return
+            except TimeoutError as err:
+                if timeout.expired():
+                    raise DeadlineExceededError() from err
+                raise
+            yield event
+
+
+async def workflow_result(
+    agent, inputs: Dict[str, Any], deadline: Optional[float] = None, callbacks: Optional[List[BaseCallbackHandler]] = None
+) -> Dict[str, Any]:
+    """
+    Run a workflow to completion and return its final state, without building an event stream.
+
+    This is what ainvoke does, except that the state after each step is kept,
+    so when the deadline passes the answers finished so far can still be returned.
+
+    :raises DeadlineExceededError: When the deadline passes; carries the last complete state
+    """
+    state = None
+    timeout = asyncio.timeout_at(deadline)
+    try:
+        async with timeout:
+            async for values in agent.astream(inputs, config={"callbacks": callbacks or []}, stream_mode="values"):
+                state = values
+    except TimeoutError as err:
+        if timeout.expired():
+            raise DeadlineExceededError(state) from err
+        raise
+    return state
+
+
+@asynccontextmanager
+async def cancel_on_disconnect(http_request: Request):
+    """
+    Cancel the current task if the HTTP client goes away.
+
+    Streaming responses are already cancelled by Starlette on disconnect; this
+    covers non-streaming requests, whose handlers would otherwise keep running.
+    """
+    task = asyncio.current_task()
+
+    async def watch():
+        while not await http_request.is_disconnected():
+            await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+        logger.info("Client disconnected, cancelling workflow run")
+        task.cancel()
+
+    watcher = asyncio.create_task(watch())
+    try:
+        yield
+    finally:
+        watcher.cancel()
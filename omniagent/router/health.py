@@ -1,9 +1,40 @@
 from fastapi import APIRouter
 from starlette import status
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, PlainTextResponse
+
+from omniagent.executors.http_client import http_client
+from omniagent.executors.token_registry import token_registry
+from omniagent.metrics.prometheus import registry as metrics_registry
+from omniagent.router.admission import admission_controller
+from omniagent.workflows.registry import workflow_registry
 
 router = APIRouter(tags=["health"])
 
 @router.get("/health", status_code=status.HTTP_200_OK, include_in_schema=False)
 async def health_check():
-    return JSONResponse(content={"status": "ok"}) 
+    return JSONResponse(content={"status": "ok"})
+
+
+@router.get("/health/workflows", status_code=status.HTTP_200_OK, include_in_schema=False)
+async def workflow_stats():
+    return JSONResponse(content=workflow_registry.stats())
+
+
+@router.get("/health/http", status_code=status.HTTP_200_OK, include_in_schema=False)
+async def http_pool_stats():
+    return JSONResponse(content=http_client.stats())
+
+
+@router.get("/health/token-list", status_code=status.HTTP_200_OK, include_in_schema=False)
+async def token_list_stats():
+    return JSONResponse(content=token_registry.stats())
+
+
+@router.get("/health/admission", status_code=status.HTTP_200_OK, include_in_schema=False)
+async def admission_stats():
+    return JSONResponse(content=admission_controller.stats())
+
+
+@router.get("/metrics", status_code=status.HTTP_200_OK, include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(content=metrics_registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,20 +1,36 @@
+import hashlib
+import re
 import time
 import uuid
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Set
+from uuid import UUID
 import traceback
 import json
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Request
 from fastapi.responses import StreamingResponse
-from langchain.schema import HumanMessage
+from starlette.background import BackgroundTask
+from langchain.schema import AIMessage, BaseMessage, HumanMessage
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.outputs import LLMResult
 from loguru import logger
 from pydantic import BaseModel, Field
 
+from omniagent.cache.semantic_cache import CachedCompletion, semantic_cache
 from omniagent.conf.llm_provider import get_available_providers
-from omniagent.workflows.workflow import build_workflow
+from omniagent.metrics.instruments import REQUEST_LATENCY, TIME_TO_FIRST_TOKEN
+from omniagent.metrics.token_usage import TokenUsageCollector
+from omniagent.router.admission import QueueFullError, Ticket, admission_controller
+from omniagent.router.cancellation import DeadlineExceededError, cancel_on_disconnect, request_deadline, workflow_events, workflow_result
+from omniagent.workflows.member import members
+from omniagent.workflows.registry import get_workflow
+from omniagent.workflows.stream_mux import AgentStreamMux
+from omniagent.workflows.workflow import route_targets
 
 router = APIRouter(tags=["Completion"])
 
+AGENT_NAMES = {member["name"] for member in members}
+
 
 class ToolCall(BaseModel):
     id: str = Field(default_factory=lambda: f"call_{str(uuid.uuid4())}")
@@ -35,6 +51,10 @@ class ChatMessage(BaseModel):
     function_call: Optional[ChatFunctionCall] = None
 
 
+class StreamOptions(BaseModel):
+    include_usage: bool = Field(default=False, description="Send a final chunk with the token usage of the whole run")
+
+
 class ChatCompletionRequest(BaseModel):
     model: str = Field(example="llama3.2",description="The language model to use for the chat completion, e.g. 'qwen2', 'mistral', 'qwen2.5', 'llama3.1', 'llama3.2', 'mistral-nemo'")
     messages: List[ChatMessage] = Field(
@@ -49,6 +69,7 @@ class ChatCompletionRequest(BaseModel):
     top_p: Optional[float] = Field(default=None, example=1.0)
     n: Optional[int] = Field(default=None, example=1)
     stream: Optional[bool] = Field(default=False, example=False)
+    stream_options: Optional[StreamOptions] = Field(default=None, example=None)
     stop: Optional[List[str]] = Field(default=None, example=[])
     max_tokens: Optional[int] = Field(default=None, example=None)
     presence_penalty: Optional[float] = Field(default=None, example=0)
@@ -62,10 +83,24 @@ class ChatChoice(BaseModel):
     finish_reason: str
 
 
+class NodeTokens(BaseModel):
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+
+
+class PromptTokensDetails(BaseModel):
+    cached_tokens: int = Field(default=0, description="Prompt tokens the providers served from their prompt cache")
+
+
 class Usage(BaseModel):
     prompt_tokens: int
     completion_tokens: int
     total_tokens: int
+    prompt_tokens_details: PromptTokensDetails = Field(default_factory=PromptTokensDetails)
+    nodes: Optional[Dict[str, NodeTokens]] = Field(
+        default=None, description="Tokens per workflow node (supervisor, agents), summed over every LLM call the node made"
+    )
 
 
 class ChatCompletionResponse(BaseModel):
@@ -95,6 +130,7 @@ class ChatCompletionStreamResponse(BaseModel):
     created: int = Field(default_factory=lambda: int(time.time()))
     model: str
     choices: List[StreamChoice]
+    usage: Optional[Usage] = None
 
 
 @router.post(
@@ -144,6 +180,36 @@ data: [DONE]"""
                 }
             }
         },
+        400: {
+            "description": "None of the messages has any content, or the model is not available",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "detail": {"error": "The request contains no message content"}
+                    }
+                }
+            }
+        },
+        429: {
+            "description": "Too many concurrent requests for the model; retry after the number of seconds in the Retry-After header",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "detail": {"error": "Too many concurrent requests for llama3.2, retry in 3s"}
+                    }
+                }
+            }
+        },
+        504: {
+            "description": "The X-Request-Timeout deadline passed before the agent produced any output",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "detail": {"error": "Deadline exceeded before any output was generated"}
+                    }
+                }
+            }
+        },
         500: {
             "description": "Internal server error",
             "content": {
@@ -156,89 +222,310 @@ data: [DONE]"""
         }
     }
 )
-async def create_chat_completion(request: ChatCompletionRequest):
+async def create_chat_completion(
+    request: ChatCompletionRequest,
+    http_request: Request,
+    x_request_timeout: Optional[float] = Header(
+        default=None,
+        description="Seconds the agent may run; when they run out the run is cancelled and the partial answer is returned "
+        "with finish_reason 'length'",
+    ),
+):
+    validate_request(request)
+    deadline = request_deadline(x_request_timeout)
+    try:
+        ticket = await admission_controller.acquire(request.model, request.user)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail={"error": str(e)}, headers={"Retry-After": str(e.retry_after)}) from e
+
     try:
         if request.stream:
+            # the slot is held until the stream finishes; the background task covers streams that never start
             return StreamingResponse(
-                stream_chat_completion(request),
-                media_type='text/event-stream'
+                stream_chat_completion(request, ticket, deadline),
+                media_type='text/event-stream',
+                background=BackgroundTask(ticket.release),
             )
 
-        llm = get_available_providers()[request.model]
-        agent = build_workflow(llm)
-
-        combined_message = "\n".join([f"{msg.role}: {msg.content}" for msg in request.messages])
+        async with cancel_on_disconnect(http_request), REQUEST_LATENCY.time(model=request.model, stream="false"):
+            return await run_chat_completion(request, deadline)
+    except HTTPException:
+        raise
+    except Exception as e:
+        error_msg = f"Error in create_chat_completion: {str(e)}\nTraceback:\n{traceback.format_exc()}"
+        logger.error(error_msg)
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": str(e),
+                "traceback": traceback.format_exc()
+            }
+        ) from e
+    finally:
+        if not request.stream:
+            ticket.release()
+
+
+def validate_request(request: ChatCompletionRequest):
+    """Reject requests that cannot run, before they take an admission slot."""
+    if not any(msg.content for msg in request.messages):
+        raise HTTPException(status_code=400, detail={"error": "The request contains no message content"})
+    # unknown models would otherwise each get their own admission queue and metric labels
+    if request.model not in get_available_providers():
+        raise HTTPException(status_code=400, detail={"error": f"Unknown model {request.model}"})
+
+
+async def run_chat_completion(request: ChatCompletionRequest, deadline: Optional[float] = None) -> ChatCompletionResponse:
+    """
+    Run one non-streaming chat completion through the workflow, using the semantic cache when possible.
+
+    :param request: The completion request; `stream` is ignored
+    :param deadline: Optional event loop time after which the run is cancelled and the partial answer returned
+    """
+    start = time.perf_counter()
+    cache_query = cacheable_query(request)
+    if cache_query:
+        cached = await semantic_cache.lookup(request.model, cache_query, system_context(request))
+        if cached:
+            return build_completion_response(
+                request, cached.content, [ToolCall(function=function) for function in cached.tool_calls], usage=build_usage(None)
+            )
 
-        tool_calls = []
-        assistant_message = None
+    llm = get_available_providers()[request.model]
+    agent = get_workflow(request.model, llm)
 
-        async for event in agent.astream_events(
-                {"messages": [HumanMessage(content=combined_message)]},
-                version="v1"
-        ):
-            if event["event"] == "on_tool_end":
-                tool_name = event["name"]
-                tool_input = event["data"]["input"]
+    messages = to_langchain_messages(request.messages)
 
-                tool_call = ToolCall(
-                    function={
-                        "name": tool_name,
-                        "arguments": json.dumps(tool_input)
-                    }
-                )
-                tool_calls.append(tool_call)
-
-            elif event["event"] == "on_chat_model_stream":
-                if isinstance(event["data"]["chunk"].content, str):
-                    assistant_message = (assistant_message or "") + event["data"]["chunk"].content
-
-        if not assistant_message and not tool_calls:
-            raise ValueError("No response generated from the agent")
-
-        # Construct OpenAI format response
-        choice = ChatChoice(
-            index=0,
-            message=ChatMessage(
-                role="assistant",
-                content=assistant_message,
-                tool_calls=tool_calls if tool_calls else None
-            ),
-            finish_reason="stop"
+    finish_reason = "stop"
+    collector = TokenUsageCollector()
+    recorder = ToolCallRecorder()
+    timer = FirstAnswerTimer(request.model, start)
+    try:
+        state = await workflow_result(agent, {"messages": messages}, deadline, [collector, recorder, timer])
+    except DeadlineExceededError as e:
+        logger.warning(f"Deadline exceeded for {request.model}, returning partial result")
+        finish_reason = "length"
+        state = e.partial_state
+
+    assistant_message = final_answer(state, len(messages))
+    tool_calls = [ToolCall(function=function) for function in recorder.calls]
+    agents = route_targets(state) if assistant_message else []
+
+    if not assistant_message and not tool_calls:
+        if finish_reason == "length":
+            raise HTTPException(status_code=504, detail={"error": "Deadline exceeded before any output was generated"})
+        raise ValueError("No response generated from the agent")
+
+    if cache_query and finish_reason == "stop":
+        semantic_cache.store(
+            request.model,
+            cache_query,
+            CachedCompletion(content=assistant_message or "", agents=agents, tool_calls=[tc.function for tc in tool_calls]),
+            system_context(request),
         )
 
-        # Estimate token usage
-        prompt_tokens = sum(len(msg.content.split()) * 1.3 for msg in request.messages)
-        completion_tokens = len(assistant_message.split()) * 1.3 if assistant_message else 0
+    return build_completion_response(request, assistant_message, tool_calls, finish_reason, build_usage(collector))
+
+
+def to_langchain_messages(messages: List[ChatMessage]) -> List[BaseMessage]:
+    """
+    Map the request's conversation onto chat messages, keeping each turn's role.
+
+    Every agent prompt starts with its own static system prompt, which is the
+    prefix providers cache between calls. Client system messages therefore
+    follow it as user turns: Anthropic and Gemini only accept a system message
+    at the very start.
+    """
+    converted = []
+    for msg in messages:
+        if not msg.content:
+            continue
+        if msg.role == "assistant":
+            converted.append(AIMessage(content=msg.content))
+        elif msg.role == "system":
+            converted.append(HumanMessage(content=f"System instructions: {msg.content}"))
+        else:
+            converted.append(HumanMessage(content=msg.content, name=msg.name))
+    return converted
+
+
+def build_completion_response(
+    request: ChatCompletionRequest,
+    assistant_message: Optional[str],
+    tool_calls: List[ToolCall],
+    finish_reason: str = "stop",
+    usage: Optional[Usage] = None,
+):
+    # Construct OpenAI format response
+    choice = ChatChoice(
+        index=0,
+        message=ChatMessage(
+            role="assistant",
+            content=assistant_message,
+            tool_calls=tool_calls if tool_calls else None
+        ),
+        finish_reason=finish_reason
+    )
+
+    return ChatCompletionResponse(
+        model=request.model,
+        choices=[choice],
+        usage=usage or build_usage(None)
+    )
+
+
+def build_usage(collector: Optional[TokenUsageCollector]) -> Usage:
+    """
+    Token usage of a workflow run across every LLM call in the graph.
+
+    Answers served from the semantic cache made no LLM calls and report zero.
+    """
+    if collector is None:
+        return Usage(prompt_tokens=0, completion_tokens=0, total_tokens=0, nodes={})
+    total = collector.total()
+    return Usage(
+        prompt_tokens=total.prompt_tokens,
+        completion_tokens=total.completion_tokens,
+        total_tokens=total.total_tokens,
+        prompt_tokens_details=PromptTokensDetails(cached_tokens=total.cached_tokens),
+        nodes={
+            node: NodeTokens(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens, total_tokens=usage.total_tokens)
+            for node, usage in collector.nodes.items()
+        },
+    )
 
-        usage = Usage(
-            prompt_tokens=int(prompt_tokens),
-            completion_tokens=int(completion_tokens),
-            total_tokens=int(prompt_tokens + completion_tokens)
-        )
 
-        return ChatCompletionResponse(
+def final_answer(state: Optional[Dict[str, Any]], input_count: int = 1) -> Optional[str]:
+    """The answer in a finished (or partially finished) run's state: the last message, unless it is still part of the input."""
+    messages = (state or {}).get("messages", [])
+    if len(messages) <= input_count or not isinstance(messages[-1].content, str):
+        return None
+    return messages[-1].content or None
+
+
+class FirstAnswerTimer(AsyncCallbackHandler):
+    """
+    Record the time until an agent first produces answer text as the time to first token of a non-streaming run.
+
+    Without an event stream no tokens are seen as they arrive, so the first
+    completed agent LLM call with content stands in for the first chunk.
+    """
+
+    def __init__(self, model: str, start: float):
+        self.model = model
+        self.start = start
+        self.observed = False
+        self._agent_runs: Set[UUID] = set()
+
+    async def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[BaseMessage]],
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        if (metadata or {}).get("langgraph_node") in AGENT_NAMES:
+            self._agent_runs.add(run_id)
+
+    async def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        if run_id not in self._agent_runs:
+            return
+        self._agent_runs.discard(run_id)
+        if not self.observed and any(generation.text for generations in response.generations for generation in generations):
+            self.observed = True
+            TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - self.start, model=self.model, stream="false")
+
+
+class ToolCallRecorder(AsyncCallbackHandler):
+    """Record the name and arguments of every tool call that completes during a run, in completion order."""
+
+    def __init__(self):
+        self.calls: List[Dict[str, Any]] = []
+        self._started: Dict[UUID, Dict[str, Any]] = {}
+
+    async def on_tool_start(
+        self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, inputs: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> None:
+        self._started[run_id] = {"name": serialized.get("name"), "arguments": json.dumps(inputs if inputs is not None else input_str)}
+
+    async def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        call = self._started.pop(run_id, None)
+        if call:
+            self.calls.append(call)
+
+    async def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started.pop(run_id, None)
+
+
+def cacheable_query(request: ChatCompletionRequest) -> Optional[str]:
+    """
+    The question to use as the semantic cache key, if the request may be cached.
+
+    Only single-turn requests qualify; an answer that depends on earlier
+    turns cannot be reused for a different conversation.
+    """
+    if not semantic_cache.enabled:
+        return None
+    turns = [msg for msg in request.messages if msg.role != "system"]
+    if len(turns) != 1 or turns[0].role != "user" or not turns[0].content:
+        return None
+    return turns[0].content
+
+
+def system_context(request: ChatCompletionRequest) -> str:
+    """
+    A hash of the request's system messages, which the semantic cache keys on
+    along with the query, since the same question under different system
+    prompts can get different answers.
+    """
+    system = "\n".join(msg.content or "" for msg in request.messages if msg.role == "system")
+    return hashlib.sha256(system.encode("utf-8")).hexdigest() if system else ""
+
+
+def track_agent(event: dict, agents: List[str]):
+    node = event.get("metadata", {}).get("langgraph_node")
+    if node in AGENT_NAMES and node not in agents:
+        agents.append(node)
+
+
+async def replay_cached_completion(request: ChatCompletionRequest, cached: CachedCompletion):
+    """Stream a cached answer back in the same SSE chunk format as a live run."""
+    for piece in re.findall(r"\s*\S+", cached.content):
+        chunk = ChatCompletionStreamResponse(
             model=request.model,
-            choices=[choice],
-            usage=usage
+            choices=[StreamChoice(
+                index=0,
+                delta=DeltaMessage(content=piece, role="assistant"),
+            )]
         )
+        yield f"data: {chunk.json()}\n\n"
 
-    except Exception as e:
-        error_msg = f"Error in create_chat_completion: {str(e)}\nTraceback:\n{traceback.format_exc()}"
-        logger.error(error_msg)
-        raise HTTPException(
-            status_code=500,
-            detail={
-                "error": str(e),
-                "traceback": traceback.format_exc()
-            }
+    for function in cached.tool_calls:
+        chunk = ChatCompletionStreamResponse(
+            model=request.model,
+            choices=[StreamChoice(
+                index=0,
+                delta=DeltaMessage(tool_calls=[ToolCall(function=function)]),
+            )]
         )
+        yield f"data: {chunk.json()}\n\n"
 
 
-async def stream_chat_completion(request: ChatCompletionRequest):
-    try:
-        llm = get_available_providers()[request.model]
-        agent = build_workflow(llm)
+async def observe_first_chunk(chunks, model: str, start: float):
+    """Pass chunks through, recording the time to the first one as the stream's time to first token."""
+    first = True
+    async for data in chunks:
+        if first:
+            first = False
+            TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - start, model=model, stream="true")
+        yield data
+
 
+async def stream_chat_completion(request: ChatCompletionRequest, ticket: Ticket, deadline: Optional[float]):
+    start = time.perf_counter()
+    try:
         # Send role information
         chunk = ChatCompletionStreamResponse(
             model=request.model,
@@ -249,46 +536,21 @@ async def stream_chat_completion(request: ChatCompletionRequest):
         )
         yield f"data: {chunk.json()}\n\n"
 
-        combined_message = "\n".join([f"{msg.role}: {msg.content}" for msg in request.messages])
-
-        async for event in agent.astream_events(
-                {"messages": [HumanMessage(content=combined_message)]},
-                version="v1"
-        ):
-            if event["event"] == "on_chat_model_stream":
-                chunk_content = event["data"]["chunk"].content
-                if chunk_content:
-                    chunk = ChatCompletionStreamResponse(
-                        model=request.model,
-                        choices=[StreamChoice(
-                            index=0,
-                            delta=DeltaMessage(content=chunk_content, role="assistant"),
-                        )]
-                    )
-                    yield f"data: {chunk.json()}\n\n"
-            elif event["event"] == "on_tool_end":
-                # Handle tool responses
-                tool_name = event["name"]
-                tool_input = event["data"]["input"]
-
-                # Create a tool call response
-                tool_call = ToolCall(
-                    function={
-                        "name": tool_name,
-                        "arguments": json.dumps(tool_input)
-                    }
-                )
-
-                chunk = ChatCompletionStreamResponse(
-                    model=request.model,
-                    choices=[StreamChoice(
-                        index=0,
-                        delta=DeltaMessage(
-                            tool_calls=[tool_call]
-                        ),
-                    )]
-                )
-                yield f"data: {chunk.json()}\n\n"
+        cache_query = cacheable_query(request)
+        cached = await semantic_cache.lookup(request.model, cache_query, system_context(request)) if cache_query else None
+        finish_reason = "stop"
+        collector = None
+        if cached:
+            chunks = replay_cached_completion(request, cached)
+        else:
+            collector = TokenUsageCollector()
+            chunks = run_chat_completion_stream(request, cache_query, deadline, collector)
+        try:
+            async for data in observe_first_chunk(chunks, request.model, start):
+                yield data
+        except DeadlineExceededError:
+            logger.warning(f"Deadline exceeded for {request.model}, ending stream with partial result")
+            finish_reason = "length"
 
         # Send end markers
         chunk = ChatCompletionStreamResponse(
@@ -296,10 +558,14 @@ async def stream_chat_completion(request: ChatCompletionRequest):
             choices=[StreamChoice(
                 index=0,
                 delta=DeltaMessage(),
-                finish_reason="stop"
+                finish_reason=finish_reason
             )]
         )
         yield f"data: {chunk.json()}\n\n"
+
+        if request.stream_options and request.stream_options.include_usage:
+            chunk = ChatCompletionStreamResponse(model=request.model, choices=[], usage=build_usage(collector))
+            yield f"data: {chunk.json()}\n\n"
         yield "data: [DONE]\n\n"
 
     except Exception as e:
@@ -311,4 +577,102 @@ async def stream_chat_completion(request: ChatCompletionRequest):
                 "error": str(e),
                 "traceback": traceback.format_exc()
             }
+        ) from e
+    finally:
+        ticket.release()
+        REQUEST_LATENCY.observe(time.perf_counter() - start, model=request.model, stream="true")
+
+
+async def run_chat_completion_stream(
+    request: ChatCompletionRequest, cache_query: Optional[str], deadline: Optional[float], collector: TokenUsageCollector
+):
+    llm = get_available_providers()[request.model]
+    agent = get_workflow(request.model, llm)
+
+    messages = to_langchain_messages(request.messages)
+    answer = StreamedAnswer(request)
+    try:
+        async for event in workflow_events(agent, {"messages": messages}, deadline, [collector]):
+            for data in answer.on_event(event):
+                yield data
+    except DeadlineExceededError:
+        # release answers held back by the mux before the stream is cut short
+        for data in answer.flush():
+            yield data
+        raise
+
+    for data in answer.flush():
+        yield data
+
+    if cache_query:
+        semantic_cache.store(request.model, cache_query, answer.completion(), system_context(request))
+
+
+class StreamedAnswer:
+    """The answer of a streaming run, turned into SSE chunks as its workflow events arrive."""
+
+    def __init__(self, request: ChatCompletionRequest):
+        self.request = request
+        self.content: List[str] = []
+        self.tool_calls: List[ToolCall] = []
+        self.agents: List[str] = []
+        # agents selected together run in parallel; keep their answers from interleaving
+        self.mux = AgentStreamMux(AGENT_NAMES)
+
+    def on_event(self, event: dict) -> Iterator[str]:
+        """The chunks to send for one workflow event."""
+        if event["event"] == "on_chat_model_stream":
+            return self._on_model_stream(event)
+        if event["event"] == "on_chain_end" and event["name"] == event["metadata"].get("langgraph_node"):
+            return self._content_chunks(self.mux.on_node_end(event["name"]))
+        if event["event"] == "on_tool_end":
+            return self._on_tool_end(event)
+        return iter(())
+
+    def flush(self) -> Iterator[str]:
+        """The chunks of answers the mux still holds back."""
+        return self._content_chunks(self.mux.flush())
+
+    def completion(self) -> CachedCompletion:
+        return CachedCompletion(content="".join(self.content), agents=self.agents, tool_calls=[tc.function for tc in self.tool_calls])
+
+    def _on_model_stream(self, event: dict) -> Iterator[str]:
+        track_agent(event, self.agents)
+        chunk_content = event["data"]["chunk"].content
+        if not chunk_content:
+            return iter(())
+        return self._content_chunks(self.mux.on_chunk(event["metadata"].get("langgraph_node"), chunk_content))
+
+    def _on_tool_end(self, event: dict) -> Iterator[str]:
+        # Create a tool call response
+        tool_call = ToolCall(
+            function={
+                "name": event["name"],
+                "arguments": json.dumps(event["data"]["input"])
+            }
         )
+        self.tool_calls.append(tool_call)
+
+        chunk = ChatCompletionStreamResponse(
+            model=self.request.model,
+            choices=[StreamChoice(
+                index=0,
+                delta=DeltaMessage(
+                    tool_calls=[tool_call]
+                ),
+            )]
+        )
+        yield f"data: {chunk.json()}\n\n"
+
+    def _content_chunks(self, pieces: List[Any]) -> Iterator[str]:
+        for piece in pieces:
+            if isinstance(piece, str):
+                self.content.append(piece)
+            chunk = ChatCompletionStreamResponse(
+                model=self.request.model,
+                choices=[StreamChoice(
+                    index=0,
+                    delta=DeltaMessage(content=piece, role="assistant"),
+                )]
+            )
+            yield f"data: {chunk.json()}\n\n"
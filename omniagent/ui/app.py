@@ -1,10 +1,10 @@
 import json
+import time
 from typing import Dict, Optional
 
 import chainlit as cl
 import chainlit.data as cl_data
 from chainlit.data.sql_alchemy import SQLAlchemyDataLayer
-from langchain.memory import ConversationBufferMemory
 from langchain.schema.runnable.config import RunnableConfig
 from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import HumanMessage
@@ -13,9 +13,13 @@ from loguru import logger
 
 from omniagent.conf.env import settings
 from omniagent.conf.llm_provider import SUPPORTED_OLLAMA_MODELS, get_available_providers
+from omniagent.metrics.instruments import UI_TURN_SETUP
+from omniagent.metrics.token_usage import TokenUsageCollector
+from omniagent.ui.memory import TokenBudgetMemory
 from omniagent.ui.profile import profile_name_to_provider_key, provider_to_profile
 from omniagent.workflows.member import members
-from omniagent.workflows.workflow import build_workflow
+from omniagent.workflows.registry import get_workflow
+from omniagent.workflows.stream_mux import AgentStreamMux
 
 
 def enable_auth():
@@ -45,30 +49,61 @@ if enable_auth():
     @cl.on_chat_resume
     async def on_chat_resume(thread: cl_data.ThreadDict):
         """Callback function when chat resumes."""
-        memory = initialize_memory()
-        root_messages = [m for m in thread["steps"]]
-        for message in root_messages:
-            if message["type"] == "user_message":
-                memory.chat_memory.add_user_message(message["output"])
-            else:
-                memory.chat_memory.add_ai_message(message["output"])
-
-        cl.user_session.set("memory", memory)
         profile = cl.user_session.get("chat_profile")
-        provider_key = profile_name_to_provider_key(profile)
-        llm = get_available_providers()[provider_key]
-        setup_runnable(llm)
+        llm = setup_runnable(profile)
+
+        turns = []
+        question = None
+        for step in thread["steps"]:
+            if step["type"] == "user_message":
+                question = step["output"]
+            elif step["type"] == "assistant_message" and question is not None:
+                turns.append((question, step["output"]))
+                question = None
+
+        memory = initialize_memory(llm, profile_name_to_provider_key(profile))
+        await memory.load(turns)
+        cl.user_session.set("memory", memory)
+
+
+def setup_runnable(profile: str) -> BaseChatModel:
+    """
+    Set up the runnable agent for the chat profile and return its chat model.
+
+    The compiled workflow comes from the workflow registry, so every session on
+    the same model shares one graph and a session only holds a reference to it.
+    """
+    provider_key = profile_name_to_provider_key(profile)
+    llm = get_available_providers()[provider_key]
+    cl.user_session.set("runnable", get_workflow(provider_key, llm))
+    cl.user_session.set("runnable_profile", profile)
+    cl.user_session.set("llm", llm)
+    return llm
 
 
-def setup_runnable(llm: BaseChatModel):
-    """Set up the runnable agent."""
-    agent = build_workflow(llm)
-    cl.user_session.set("runnable", agent)
+async def session_runnable():
+    """The session's runnable and chat model, set up again only when missing or when the chat profile changed."""
+    start = time.perf_counter()
+    profile = cl.user_session.get("chat_profile")
+    runnable = cl.user_session.get("runnable")
+    reused = runnable is not None and cl.user_session.get("runnable_profile") == profile
+    if reused:
+        llm = cl.user_session.get("llm")
+    else:
+        llm = setup_runnable(profile)
+        runnable = cl.user_session.get("runnable")
+        memory = cl.user_session.get("memory")  # type: TokenBudgetMemory
+        if memory is None:
+            cl.user_session.set("memory", initialize_memory(llm, profile_name_to_provider_key(profile)))
+        else:
+            await memory.switch_model(llm, profile_name_to_provider_key(profile))
+    UI_TURN_SETUP.observe(time.perf_counter() - start, runnable="reused" if reused else "rebuilt")
+    return runnable, llm
 
 
-def initialize_memory() -> ConversationBufferMemory:
-    """Initialize conversation memory."""
-    return ConversationBufferMemory(return_messages=True)
+def initialize_memory(llm: BaseChatModel, model: str) -> TokenBudgetMemory:
+    """Initialize conversation memory, bounded by the model's history token budget."""
+    return TokenBudgetMemory(llm, model)
 
 
 @cl.set_chat_profiles
@@ -83,11 +118,24 @@ async def chat_profile():
 @cl.on_chat_start
 async def on_chat_start():
     """Callback function when chat starts."""
-    cl.user_session.set("memory", initialize_memory())
     profile = cl.user_session.get("chat_profile")
-    provider_key = profile_name_to_provider_key(profile)
-    llm = get_available_providers()[provider_key]
-    setup_runnable(llm)
+    llm = setup_runnable(profile)
+    cl.user_session.set("memory", initialize_memory(llm, profile_name_to_provider_key(profile)))
+
+
+@cl.on_chat_end
+async def on_chat_end():
+    """
+    Callback function when the client disconnects.
+
+    The runnable reference is dropped right away and set up again if the client
+    reconnects; the memory stays until Chainlit expires the session after
+    session_timeout, so a reconnect keeps its history.
+    """
+    cl.user_session.set("runnable", None)
+    memory = cl.user_session.get("memory")  # type: TokenBudgetMemory
+    if memory is not None:
+        memory.close()
 
 
 def build_token(token_symbol: str, token_address: str):
@@ -97,14 +145,8 @@ def build_token(token_symbol: str, token_address: str):
 @cl.on_message
 async def on_message(message: cl.Message):  # noqa
     """Callback function to handle user messages."""
-    memory = cl.user_session.get("memory")  # type: ConversationBufferMemory
-
-    profile = cl.user_session.get("chat_profile")
-    provider_key = profile_name_to_provider_key(profile)
-    llm = get_available_providers()[provider_key]
-
-    setup_runnable(llm)
-    runnable = cl.user_session.get("runnable")
+    runnable, llm = await session_runnable()
+    memory = cl.user_session.get("memory")  # type: TokenBudgetMemory
 
     msg = cl.Message(content="")
     agent_names = [member["name"] for member in members]
@@ -116,38 +158,49 @@ async def on_message(message: cl.Message):  # noqa
         supports_tools = True
 
     if supports_tools:
+        mux = AgentStreamMux(agent_names)
         async for event in runnable.astream_events(
-            {"messages": [*memory.chat_memory.messages, HumanMessage(content=message.content)]},
-            config=RunnableConfig(callbacks=[cl.LangchainCallbackHandler(stream_final_answer=True)]),
-            version="v1",
+            {"messages": [*memory.messages, HumanMessage(content=message.content)]},
+            config=RunnableConfig(callbacks=[cl.LangchainCallbackHandler(stream_final_answer=True), TokenUsageCollector()]),
+            version="v2",
         ):
             kind = event["event"]
             if kind == "on_tool_end":
                 await handle_tool_end(event, msg)
-            elif kind == "on_chat_model_stream":  # noqa
-                if event["metadata"]["langgraph_node"] in agent_names:
+            elif kind == "on_chat_model_stream":
+                node = event["metadata"]["langgraph_node"]
+                if node in agent_names:
                     content = event["data"]["chunk"].content
                     if content:
-                        if isinstance(event["data"]["chunk"].content ,list):
-                            for chunk in content:
-                                if chunk['type'] == 'text':
-                                    await msg.stream_token(chunk['text'])
-                                else:
-                                    print(chunk)
-                        else:
-                            await msg.stream_token(content)
+                        for piece in mux.on_chunk(node, content):
+                            await stream_content(msg, piece)
+            elif kind == "on_chain_end" and event["name"] == event["metadata"].get("langgraph_node"):
+                for piece in mux.on_node_end(event["name"]):
+                    await stream_content(msg, piece)
+        for piece in mux.flush():
+            await stream_content(msg, piece)
     else:
         # simple conversation handling logic
         async for chunk in runnable.astream(
-            [*memory.chat_memory.messages, HumanMessage(content=message.content)],
-            config=RunnableConfig(callbacks=[cl.LangchainCallbackHandler(stream_final_answer=True)]),
+            [*memory.messages, HumanMessage(content=message.content)],
+            config=RunnableConfig(callbacks=[cl.LangchainCallbackHandler(stream_final_answer=True), TokenUsageCollector()]),
         ):
             if chunk.content:
                 await msg.stream_token(chunk.content)
 
     await msg.send()
-    memory.chat_memory.add_user_message(message.content)
-    memory.chat_memory.add_ai_message(msg.content)
+    await memory.add_turn(message.content, msg.content)
+
+
+async def stream_content(msg: cl.Message, content):
+    if isinstance(content, list):
+        for chunk in content:
+            if chunk['type'] == 'text':
+                await msg.stream_token(chunk['text'])
+            else:
+                print(chunk)
+    else:
+        await msg.stream_token(content)
 
 
 async def handle_tool_end(event, msg):
@@ -0,0 +1,141 @@
+import asyncio
+from typing import List, Optional, Tuple
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, get_buffer_string
+from loguru import logger
+
+from omniagent.conf.env import settings
+from omniagent.executors.thread_pools import run_blocking
+from omniagent.metrics.tokenizers import tokenizer_registry
+
+SUMMARY_PROMPT = """
+You maintain a running summary of a conversation between a user and a Web3 assistant.
+Fold the new turns into the existing summary. Keep facts the user stated (wallets, tokens,
+chains, amounts, preferences), open questions and conclusions; drop small talk and raw tool output.
+Answer with the updated summary only, in at most {words} words.
+"""
+
+Turn = Tuple[HumanMessage, AIMessage]
+
+
+def memory_budget(model: str) -> int:
+    return settings.UI_MEMORY_TOKEN_BUDGETS.get(model, settings.UI_MEMORY_TOKEN_BUDGET)
+
+
+class TokenBudgetMemory:
+    """
+    Conversation history of one chat session, bounded by a token budget.
+
+    The most recent turns are kept verbatim. Turns that no longer fit the budget
+    are folded into a rolling summary by a background task once the answer has
+    been sent, so the prompt each turn stays about the same size however long
+    the session runs, and the summary call never delays a reply. Until that task
+    finishes, the evicted turns are simply left out of the prompt.
+
+    Each turn is counted once, when it is added, on the tokenizer thread pool,
+    since counting (or a tokenizer's first load) would otherwise block the
+    event loop; trimming only adds up the kept counts.
+    """
+
+    def __init__(self, llm: BaseChatModel, model: str, budget: Optional[int] = None):
+        """
+        :param llm: The session's chat model, also used to write the summary
+        :param model: Model name, used to pick the tokenizer and the budget
+        :param budget: Token budget for the history; defaults to the model's UI_MEMORY_TOKEN_BUDGET
+        """
+        self.llm = llm
+        self.model = model
+        self.budget = budget or memory_budget(model)
+        self.summary: Optional[str] = None
+        self._summary_tokens = 0
+        self._turns: List[Turn] = []
+        # token counts of _turns, in the same order
+        self._sizes: List[int] = []
+        self._evicted: List[Turn] = []
+        self._summarizing: Optional[asyncio.Task] = None
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        """The history to put in front of the next user message: the summary, if any, then the recent turns."""
+        history: List[BaseMessage] = []
+        if self.summary:
+            history.append(HumanMessage(content=f"Summary of the earlier conversation:\n{self.summary}"))
+        for user, ai in self._turns:
+            history += [user, ai]
+        return history
+
+    async def add_turn(self, user: str, ai: str):
+        await self._add([(HumanMessage(content=user), AIMessage(content=ai))])
+
+    async def load(self, turns: List[Tuple[str, str]]):
+        """Restore a resumed thread; only what fits the budget is kept verbatim, and the rest summarized."""
+        await self._add([(HumanMessage(content=user), AIMessage(content=ai)) for user, ai in turns])
+
+    async def switch_model(self, llm: BaseChatModel, model: str):
+        """Keep the history when the session changes chat profile, re-counted and re-trimmed for the new model."""
+        self.llm = llm
+        self.model = model
+        self.budget = memory_budget(model)
+        self._sizes = await run_blocking("tokenizer", self._count_each, self._turns)
+        self._summary_tokens = await run_blocking("tokenizer", tokenizer_registry.count, model, self.summary or "")
+        self._trim()
+
+    def close(self):
+        if self._summarizing is not None:
+            self._summarizing.cancel()
+
+    def _count(self, turns: List[Turn]) -> int:
+        return tokenizer_registry.count(self.model, get_buffer_string([message for turn in turns for message in turn]))
+
+    def _count_each(self, turns: List[Turn]) -> List[int]:
+        return [self._count([turn]) for turn in turns]
+
+    async def _add(self, turns: List[Turn]):
+        sizes = await run_blocking("tokenizer", self._count_each, turns)
+        self._turns += turns
+        self._sizes += sizes
+        self._trim()
+
+    def _trim(self):
+        available = self.budget - self._summary_tokens
+        # the latest turn is always kept, even when it alone exceeds the budget
+        while len(self._turns) > 1 and sum(self._sizes) > available:
+            self._sizes.pop(0)
+            self._evicted.append(self._turns.pop(0))
+
+        if self._evicted and (self._summarizing is None or self._summarizing.done()):
+            self._summarizing = asyncio.create_task(self._summarize())
+
+    async def _summarize(self):
+        while self._evicted:
+            evicted, self._evicted = self._evicted, []
+            turns = await run_blocking("tokenizer", self._backlog, evicted)
+            prompt = [
+                SystemMessage(content=SUMMARY_PROMPT.format(words=int(settings.UI_MEMORY_SUMMARY_TOKENS * 0.75))),
+                HumanMessage(
+                    content=f"Existing summary:\n{self.summary or '(none)'}\n\n"
+                    f"New turns:\n{get_buffer_string([message for turn in turns for message in turn])}"
+                ),
+            ]
+            try:
+                response = await self.llm.ainvoke(prompt)
+            except Exception as e:
+                # the turns are dropped rather than retried, so a failing model cannot grow the backlog forever
+                logger.warning(f"Failed to summarize {len(turns)} conversation turns: {e}")
+                continue
+            if isinstance(response.content, str) and response.content.strip():
+                self.summary = response.content.strip()
+                self._summary_tokens = await run_blocking("tokenizer", tokenizer_registry.count, self.model, self.summary)
+
+    def _backlog(self, evicted: List[Turn]) -> List[Turn]:
+        """The evicted turns to summarize next, capped at twice the budget so one summary call stays bounded; the newest win."""
+        turns: List[Turn] = []
+        tokens = 0
+        for turn in reversed(evicted):
+            tokens += self._count([turn])
+            if turns and tokens > self.budget * 2:
+                logger.info(f"Dropping {len(evicted) - len(turns)} old turns that do not fit the summary backlog")
+                break
+            turns.insert(0, turn)
+        return turns
@@ -0,0 +1,144 @@
+import asyncio
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from langchain_core.messages import BaseMessage
+from loguru import logger
+
+from omniagent.conf.env import settings
+from omniagent.index.pgvector_store import build_embeddings
+from omniagent.workflows.member import ASSET_MANAGEMENT, BLOCK_EXPLORER, FALLBACK, FEED_EXPLORER, MARKET_ANALYSIS, RESEARCH_ANALYST
+
+ROUTING_EXAMPLES: Dict[str, List[str]] = {
+    MARKET_ANALYSIS: [
+        "What's the current price of Ethereum?",
+        "What's BTC price now?",
+        "How is the crypto market doing today?",
+        "Show me the top 10 coins by market cap",
+        "Which tokens have the highest trading volume?",
+        "What's the funding rate for BTC on binance?",
+        "What are the top NFT collections right now?",
+        "Is SOL going up or down this week?",
+    ],
+    ASSET_MANAGEMENT: [
+        "Swap 1 ETH for USDC on Ethereum",
+        "swap 1 eth to usdt on ethereum.",
+        "Transfer 0.1 ETH to 0x742d35Cc6634C0532925a3b844Bc454e4438f44e",
+        "Send 100 USDT to vitalik.eth",
+        "What tokens does my wallet hold?",
+        "Check the token balance of 0x33c0814654fa367ce67d8531026eb4481290e63c",
+        "Which NFTs are in this wallet?",
+        "Exchange my ARB for ETH on Arbitrum",
+    ],
+    BLOCK_EXPLORER: [
+        "What's the latest block height on Ethereum?",
+        "What are the current gas fees?",
+        "How many transactions were on Bitcoin in the last 24 hours?",
+        "Show me the blockchain stats for Dogecoin",
+        "What's the mempool size on Bitcoin?",
+        "How congested is the Ethereum network right now?",
+    ],
+    FEED_EXPLORER: [
+        "What has vitalik.eth been doing recently?",
+        "Show me the latest crypto news",
+        "Show me recent posts from vitalik.eth",
+        "What are the social activities of 0x742d35Cc6634C0532925a3b844Bc454e4438f44e?",
+        "Show me the latest social interactions for vitalik.eth on Farcaster.",
+        "What are the recent DeFi activities for this address?",
+        "Get me the latest 5 news updates from crypto channels",
+    ],
+    RESEARCH_ANALYST: [
+        "Tell me about the Uniswap project",
+        "Who are the investors behind RSS3?",
+        "Who is on the team of Arbitrum?",
+        "Give me a detailed analysis of the Aave project and its market position",
+        "What is the background of the Lido project?",
+        "Research the funding rounds of EigenLayer",
+    ],
+    FALLBACK: [
+        "Hello, who are you?",
+        "What's the weather like today in New York?",
+        "Tell me a joke",
+        "What can you help me with?",
+        "Thanks, that's all",
+    ],
+}
+
+
+@dataclass
+class RouteDecision:
+    role: str
+    similarity: float
+    margin: float
+
+
+def _normalize(vector: Sequence[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+def _centroid(vectors: List[List[float]]) -> List[float]:
+    return _normalize([sum(column) / len(vectors) for column in zip(*vectors)])
+
+
+class FastRouter:
+    """
+    Nearest-centroid intent classifier over embeddings of labelled example queries.
+
+    Confident classifications skip the supervisor's LLM round trip entirely;
+    anything below the similarity or margin thresholds is left to the LLM.
+    """
+
+    def __init__(self, examples: Dict[str, List[str]]):
+        self._examples = examples
+        self._centroids: Optional[Dict[str, List[float]]] = None
+        self._lock = asyncio.Lock()
+
+    async def classify(self, query: str) -> Optional[RouteDecision]:
+        centroids = await self._load_centroids()
+        embedding = _normalize(await build_embeddings().aembed_query(query))
+
+        scores = sorted(
+            ((sum(a * b for a, b in zip(embedding, centroid)), role) for role, centroid in centroids.items()),
+            reverse=True,
+        )
+        (best, role), (runner_up, _) = scores[0], scores[1]
+        return RouteDecision(role=role, similarity=best, margin=best - runner_up)
+
+    async def route(self, messages: Sequence[BaseMessage]) -> Optional[RouteDecision]:
+        """
+        Route the conversation locally, or return None when the LLM supervisor should decide.
+        """
+        query = messages[-1].content if messages else ""
+        if not isinstance(query, str) or not query:
+            return None
+
+        try:
+            decision = await self.classify(query)
+        except Exception as e:
+            logger.warning(f"Fast router unavailable, using LLM supervisor: {e}")
+            return None
+
+        confident = decision.similarity >= settings.FAST_ROUTER_MIN_SIMILARITY and decision.margin >= settings.FAST_ROUTER_MIN_MARGIN
+        logger.info(
+            f"Fast router {'selected' if confident else 'deferred'} {decision.role} "
+            f"(similarity {decision.similarity:.3f}, margin {decision.margin:.3f})"
+        )
+        return decision if confident else None
+
+    async def _load_centroids(self) -> Dict[str, List[float]]:
+        if self._centroids is not None:
+            return self._centroids
+        async with self._lock:
+            if self._centroids is None:
+                embeddings = build_embeddings()
+                centroids = {}
+                for role, queries in self._examples.items():
+                    vectors = await embeddings.aembed_documents(queries)
+                    centroids[role] = _centroid([_normalize(v) for v in vectors])
+                self._centroids = centroids
+        return self._centroids
+
+
+fast_router = FastRouter(ROUTING_EXAMPLES)
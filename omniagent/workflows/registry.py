@@ -0,0 +1,113 @@
+import json
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Tuple
+
+from langchain_core.language_models import BaseChatModel
+from loguru import logger
+
+from omniagent.workflows.workflow import build_workflow
+
+
+@dataclass
+class WorkflowStats:
+    hits: int = 0
+    misses: int = 0
+    builds: int = 0
+    last_build_seconds: float = 0.0
+    total_build_seconds: float = 0.0
+
+
+def provider_fingerprint(llm: BaseChatModel) -> str:
+    """
+    Describe the provider configuration a workflow was compiled against.
+
+    Two chat models with the same class and identifying params produce the same
+    graph, so a changed fingerprint is what forces a rebuild.
+    """
+    try:
+        params = json.dumps(llm._identifying_params, sort_keys=True, default=str)
+    except Exception:
+        params = repr(llm)
+    return f"{type(llm).__name__}:{params}"
+
+
+class WorkflowRegistry:
+    """
+    Compile each model's workflow once and share it across requests.
+
+    Compiled graphs hold no per-request state, so a single instance can serve
+    concurrent runs. Builds are serialized per model so a burst of cold requests
+    only compiles the graph once.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._workflows: Dict[str, Tuple[str, Any]] = {}
+        self._stats: Dict[str, WorkflowStats] = {}
+
+    def get(self, model: str, llm: BaseChatModel):
+        fingerprint = provider_fingerprint(llm)
+
+        cached = self._lookup(model, fingerprint)
+        if cached is not None:
+            return cached
+
+        with self._build_lock(model):
+            # another request may have finished the build while we were waiting
+            cached = self._lookup(model, fingerprint, count_hit=False)
+            if cached is not None:
+                return cached
+            return self._build(model, fingerprint, llm)
+
+    def invalidate(self, model: str | None = None):
+        with self._lock:
+            if model is None:
+                self._workflows.clear()
+            else:
+                self._workflows.pop(model, None)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {model: asdict(stats) for model, stats in self._stats.items()}
+
+    def _lookup(self, model: str, fingerprint: str, count_hit: bool = True):
+        with self._lock:
+            entry = self._workflows.get(model)
+            if entry is None or entry[0] != fingerprint:
+                return None
+            if count_hit:
+                self._stats_for(model).hits += 1
+            return entry[1]
+
+    def _build(self, model: str, fingerprint: str, llm: BaseChatModel):
+        start = time.perf_counter()
+        workflow = build_workflow(llm)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            stats = self._stats_for(model)
+            stats.misses += 1
+            stats.builds += 1
+            stats.last_build_seconds = elapsed
+            stats.total_build_seconds += elapsed
+            self._workflows[model] = (fingerprint, workflow)
+
+        logger.info(f"Compiled workflow for {model} in {elapsed:.3f}s")
+        return workflow
+
+    def _build_lock(self, model: str) -> threading.Lock:
+        with self._lock:
+            return self._build_locks.setdefault(model, threading.Lock())
+
+    def _stats_for(self, model: str) -> WorkflowStats:
+        return self._stats.setdefault(model, WorkflowStats())
+
+
+workflow_registry = WorkflowRegistry()
+
+
+def get_workflow(model: str, llm: BaseChatModel):
+    return workflow_registry.get(model, llm)
@@ -0,0 +1,64 @@
+from collections import OrderedDict
+from typing import Any, Iterable, List, Optional
+
+SEPARATOR = "\n\n"
+
+
+class AgentStreamMux:
+    """
+    Serialize the token streams of agents that run in parallel.
+
+    The first agent to produce tokens streams live. Tokens from the other
+    agents are held back and released, one agent at a time, once the live
+    agent's node has finished, so the client never sees interleaved answers.
+    """
+
+    def __init__(self, agent_names: Iterable[str]):
+        self._agent_names = set(agent_names)
+        self._active: Optional[str] = None
+        self._finished: set[str] = set()
+        self._pending: OrderedDict[str, List[Any]] = OrderedDict()
+        self._emitted = False
+
+    def on_chunk(self, node: Optional[str], content: Any) -> List[Any]:
+        """Return the content that can be sent now for a chunk streamed by `node`."""
+        if node not in self._agent_names:
+            return [content]
+        if self._active is None:
+            return [*self._activate(node), content]
+        if node == self._active:
+            return [content]
+        self._pending.setdefault(node, []).append(content)
+        return []
+
+    def on_node_end(self, node: Optional[str]) -> List[Any]:
+        """Return held-back content that can be sent now that `node` has finished."""
+        if node not in self._agent_names:
+            return []
+        self._finished.add(node)
+        if node != self._active:
+            return []
+
+        released: List[Any] = []
+        self._active = None
+        while self._pending:
+            next_node, chunks = self._pending.popitem(last=False)
+            released += self._activate(next_node) + chunks
+            if next_node not in self._finished:
+                break
+            self._active = None
+        return released
+
+    def flush(self) -> List[Any]:
+        """Release everything still held back, e.g. when the run ends early."""
+        released: List[Any] = []
+        while self._pending:
+            node, chunks = self._pending.popitem(last=False)
+            released += self._activate(node) + chunks
+        return released
+
+    def _activate(self, node: str) -> List[Any]:
+        self._active = node
+        prefix = [SEPARATOR] if self._emitted else []
+        self._emitted = True
+        return prefix
@@ -1,22 +1,45 @@
+import time
+from typing import List, Optional
+
 from dotenv import load_dotenv
 from langchain_core.output_parsers import JsonOutputToolsParser
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_google_vertexai import ChatVertexAI
 from loguru import logger
 
-from omniagent.workflows.member import AgentRole, members
+from omniagent.conf.env import settings
+from omniagent.metrics.instruments import SUPERVISOR_LATENCY
+from omniagent.workflows.fast_router import fast_router
+from omniagent.workflows.member import FALLBACK, AgentRole, members
 
 load_dotenv()
 
 
 @tool
-def route(next_: AgentRole):
-    """Select the next role."""
+def route(next_: AgentRole, also: Optional[List[AgentRole]] = None):
+    """Select the next role. If the request has independent parts that need other roles too, list them in also."""
     pass
 
 
+def select_targets(next_: str, also: Optional[List[str]]) -> List[str]:
+    """
+    The agents to run for this turn, primary first.
+
+    Extra agents are deduplicated and capped at MAX_PARALLEL_AGENTS; the
+    fallback agent is dropped whenever a specialist was also selected.
+    """
+    targets = [next_]
+    for role in also or []:
+        if role not in targets:
+            targets.append(role)
+    if len(targets) > 1:
+        targets = [role for role in targets if role != FALLBACK] or [FALLBACK]
+    return targets[: max(settings.MAX_PARALLEL_AGENTS, 1)]
+
+
 def build_supervisor_chain(llm):
     system_prompt = """
 You are an AI Agent Supervisor coordinating specialized AI Agents. Your task:
@@ -31,6 +54,8 @@ Selection principles:
 - Match Agent expertise to current needs.
 - Prioritize Agents who can advance the task.
 - Choose the Agent for the most comprehensive response.
+- If the request has several independent parts that need different Agents, select the main Agent and list the others
+  in `also`; they will run in parallel.
 
 Based on these guidelines, select the next AI Agent or end the conversation.
 """
@@ -48,10 +73,11 @@ Based on these guidelines, select the next AI Agent or end the conversation.
     def extract_next(x):
         try:
             next__ = x[-1]["args"]["next_"]
+            also = x[-1]["args"].get("also")
         except Exception:
             logger.warning(f"Error extracting next agent: {x}")
-            next__ = "fallback_agent"
-        return {"next": next__}
+            next__, also = "fallback_agent", None
+        return {"next": next__, "targets": select_targets(next__, also)}
 
     def get_tool_choice(llm):
         if isinstance(llm, ChatVertexAI) and llm.model_name == "gemini-1.5-flash":
@@ -63,3 +89,23 @@ Based on these guidelines, select the next AI Agent or end the conversation.
     tool_choice = get_tool_choice(llm)
 
     return prompt | llm.bind_tools(tools=[route], tool_choice=tool_choice) | JsonOutputToolsParser() | extract_next
+
+
+def build_supervisor_node(llm):
+    """
+    The supervisor graph node: the fast router when it is confident, the LLM supervisor chain otherwise.
+    """
+    supervisor_chain = build_supervisor_chain(llm)
+
+    async def supervisor(state, config: RunnableConfig):
+        start = time.perf_counter()
+        if settings.FAST_ROUTER_ENABLED:
+            decision = await fast_router.route(state["messages"])
+            if decision:
+                SUPERVISOR_LATENCY.observe(time.perf_counter() - start, router="fast")
+                return {"next": decision.role, "targets": [decision.role]}
+        result = await supervisor_chain.ainvoke(state, config)
+        SUPERVISOR_LATENCY.observe(time.perf_counter() - start, router="llm")
+        return result
+
+    return supervisor
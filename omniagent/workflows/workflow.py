@@ -1,5 +1,5 @@
 import operator
-from typing import Annotated, Sequence, TypedDict
+from typing import Annotated, List, Sequence, TypedDict
 
 from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import BaseMessage, HumanMessage
@@ -13,22 +13,40 @@ from omniagent.agents.fallback import build_fallback_agent
 from omniagent.agents.feed_explore import build_feed_explorer_agent
 from omniagent.agents.research_analyst import build_research_analyst_agent
 from omniagent.conf.llm_provider import SUPPORTED_OLLAMA_MODELS
+from omniagent.metrics.instruments import NODE_LATENCY
 
 
 class AgentState(TypedDict):
     messages: Annotated[Sequence[BaseMessage], operator.add]
     next: str
+    targets: List[str]
 
 
 def create_node(agent, name):
     async def run(state):
         logger.info(f"Running {name} agent")
-        result = await agent.ainvoke(state)
+        with NODE_LATENCY.time(node=name):
+            result = await agent.ainvoke(state)
         return {"messages": [HumanMessage(content=result["output"], name=name)]}
 
     return run
 
 
+def route_targets(state):
+    return state.get("targets") or [state["next"]]
+
+
+def combine_results(state):
+    """Merge the answers of agents that ran in parallel into one message."""
+    targets = route_targets(state)
+    if len(targets) < 2:
+        return {"messages": []}
+
+    answers = [message.content for message in state["messages"][-len(targets) :]]
+    logger.info(f"Combining results from {', '.join(targets)}")
+    return {"messages": [HumanMessage(content="\n\n".join(answers), name="combine")]}
+
+
 def build_workflow(llm: BaseChatModel):
     is_ollama = isinstance(llm, ChatOllama)
     if hasattr(llm, "model") and is_ollama:
@@ -52,7 +70,7 @@ def build_simple_workflow(llm: BaseChatModel):
 def build_tool_workflow(llm: BaseChatModel):
     from omniagent.agents.market_analysis import build_market_analysis_agent
     from omniagent.workflows.member import members
-    from omniagent.workflows.supervisor_chain import build_supervisor_chain
+    from omniagent.workflows.supervisor_chain import build_supervisor_node
 
     market_analysis_agent_node = create_node(build_market_analysis_agent(llm), "market_analysis_agent")
     asset_management_agent_node = create_node(build_asset_management_agent(llm), "asset_management_agent")
@@ -66,15 +84,19 @@ def build_tool_workflow(llm: BaseChatModel):
     workflow.add_node("block_explorer_agent", block_explorer_agent_node)
     workflow.add_node("feed_explorer_agent", feed_explorer_agent_node)
     workflow.add_node("research_analyst_agent", research_analyst_agent_node)
-    workflow.add_node("supervisor", build_supervisor_chain(llm))
+    workflow.add_node("supervisor", build_supervisor_node(llm))
     workflow.add_node("fallback_agent", build_fallback_agent(llm))
 
+    workflow.add_node("combine", combine_results)
+
     member_names = list(map(lambda x: x["name"], members))
 
+    # agents picked together run as parallel branches and meet again in the combine node
     for member in member_names:
-        workflow.add_edge(member, END)
+        workflow.add_edge(member, "combine")
+    workflow.add_edge("combine", END)
 
     conditional_map = {k: k for k in member_names}
-    workflow.add_conditional_edges("supervisor", lambda x: x["next"], conditional_map)
+    workflow.add_conditional_edges("supervisor", route_targets, conditional_map)
     workflow.set_entry_point("supervisor")
     return workflow.compile()